@@ -3,13 +3,19 @@
 from fastapi import FastAPI
 from korito.loader import validate_ngahere_heart
 from routes import kaka
+from routes import metrics_router
+from manu.route_metrics import RouteMetricsMiddleware
 
 app = FastAPI(title="Ngahere-OS", version="1.0")
 
 validate_ngahere_heart()
 
+# Per-route latency, traffic and errors, read by Tauhou and /metrics
+app.add_middleware(RouteMetricsMiddleware)
+
 # Manu router loading
 app.include_router(kaka.router)
+app.include_router(metrics_router.router)
 
 @app.get("/")
 def root():
@@ -0,0 +1,193 @@
+"""
+Circuit Breaker - Load shedding for Cloud Kaitiaki providers
+A closed/open/half-open breaker stops traffic to a failing backend, and an
+AIMD concurrency limiter shrinks in-flight requests when latency or errors rise.
+"""
+
+import time
+import threading
+from typing import Dict, Optional
+
+class ProviderRejected(Exception):
+    """Raised when a provider sheds a request instead of queueing it"""
+    pass
+
+class CircuitBreaker:
+    """
+    Closed: requests flow and consecutive failures are counted.
+    Open: requests are rejected until recovery_timeout has passed.
+    Half-open: up to half_open_max_calls probes are let through; success_threshold
+    successes close the breaker again, any failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, success_threshold: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.state = self.CLOSED
+        self.failures = 0
+        self.half_open_calls = 0
+        self.half_open_successes = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a request may go to the provider right now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self.half_open_calls = 0
+                self.half_open_successes = 0
+            if self.state == self.HALF_OPEN:
+                if self.half_open_calls >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return False
+                self.half_open_calls += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.half_open_calls = max(self.half_open_calls - 1, 0)
+                self.half_open_successes += 1
+                if self.half_open_successes >= self.success_threshold:
+                    self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._open()
+
+    def release_probe(self):
+        """Give back a half-open probe slot whose call was abandoned"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self.half_open_calls:
+                self.half_open_calls -= 1
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = round(max(self.recovery_timeout - (time.monotonic() - self.opened_at), 0.0), 2)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout_seconds": self.recovery_timeout,
+                "retry_in_seconds": retry_in,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on in-flight requests.
+    Each success under the latency target grows the limit by 1/limit (about +1
+    per window of requests); a failure or a slow response multiplies it by
+    backoff. Requests over the limit are rejected at once rather than queued.
+    The latency target is latency_tolerance times a slow-moving baseline of
+    the provider's own successful latencies, never below min_latency_target.
+    """
+
+    def __init__(self, initial_limit: float = 10, min_limit: float = 1, max_limit: float = 100,
+                 backoff: float = 0.7, latency_tolerance: float = 2.0, baseline_alpha: float = 0.05,
+                 min_latency_target: float = 0.1):
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.baseline_alpha = baseline_alpha
+        self.min_latency_target = min_latency_target
+        self.baseline: Optional[float] = None
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: float, success: Optional[bool]):
+        """Free a slot; success=None (cancelled) leaves the limit untouched"""
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            if success is None:
+                return
+            slow = self.baseline is not None and latency > max(
+                self.baseline * self.latency_tolerance, self.min_latency_target
+            )
+            if success and not slow:
+                self.limit = min(self.limit + 1.0 / self.limit, self.max_limit)
+            else:
+                self.limit = max(self.limit * self.backoff, self.min_limit)
+            if success:
+                if self.baseline is None:
+                    self.baseline = latency
+                else:
+                    self.baseline += self.baseline_alpha * (latency - self.baseline)
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "baseline_latency_ms": round(self.baseline * 1000, 2) if self.baseline is not None else None,
+                "rejected": self.rejected
+            }
+
+class ProviderGuard:
+    """Circuit breaker plus concurrency limiter in front of one provider"""
+
+    def __init__(self, name: str, breaker: CircuitBreaker, limiter: AdaptiveConcurrencyLimiter):
+        self.name = name
+        self.breaker = breaker
+        self.limiter = limiter
+
+    def admit(self):
+        """Take a slot, or raise ProviderRejected so the caller falls back at once"""
+        if not self.breaker.allow_request():
+            raise ProviderRejected(f"{self.name} circuit is open")
+        if not self.limiter.try_acquire():
+            self.breaker.release_probe()
+            raise ProviderRejected(f"{self.name} is at its concurrency limit ({int(self.limiter.limit)})")
+
+    def release(self, latency: float, success: Optional[bool]):
+        """Return the slot; success=None means the call was cancelled"""
+        self.limiter.release(latency, success)
+        if success is True:
+            self.breaker.record_success()
+        elif success is False:
+            self.breaker.record_failure()
+        else:
+            self.breaker.release_probe()
+
+    def get_status(self) -> Dict:
+        return {
+            "circuit_breaker": self.breaker.get_status(),
+            "concurrency": self.limiter.get_status()
+        }
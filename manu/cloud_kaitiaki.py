@@ -4,17 +4,28 @@ Supports multiple AI providers with automatic fallback and model switching
 """
 
 import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import requests
+import httpx
 import json
-from typing import Dict, List, Optional, Union
+import yaml
+from typing import AsyncIterator, Dict, List, Optional, Union
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from enum import Enum
 from abc import ABC, abstractmethod
 from pathlib import Path
-import sys
-
-# Add korito to path
-sys.path.append(str(Path(__file__).parent / "korito"))
-from loader import korito, get_korito_secret
+from manu.latency_histogram import LatencyHistogram
+from manu.response_cache import ResponseCache
+from manu.single_flight import SingleFlight
+from manu.circuit_breaker import (
+    AdaptiveConcurrencyLimiter, CircuitBreaker, ProviderGuard, ProviderRejected
+)
 
 class AIProvider(Enum):
     """Supported AI providers"""
@@ -28,18 +39,378 @@ class ModelConfig:
     """Configuration for a specific model"""
     def __init__(self, name: str, provider: AIProvider, endpoint: str, 
                  api_key: str = None, max_tokens: int = 4000, 
-                 temperature: float = 0.7, **kwargs):
+                 temperature: float = 0.7, capabilities: List[str] = None, **kwargs):
         self.name = name
         self.provider = provider
         self.endpoint = endpoint
         self.api_key = api_key
         self.max_tokens = max_tokens
         self.temperature = temperature
+        self.capabilities = capabilities or []
         self.kwargs = kwargs
 
+NGAHERE_ROOT = Path(__file__).resolve().parents[1]
+
+# Used when neither manifest declares a models section
+DEFAULT_MODEL_SPECS = [
+    {"name": "gpt-4", "provider": "openai", "endpoint": "https://api.openai.com",
+     "api_key_secret": "OPENAI_API_KEY", "capabilities": ["chat", "code", "summarise"]},
+    {"name": "gpt-3.5-turbo", "provider": "openai", "endpoint": "https://api.openai.com",
+     "api_key_secret": "OPENAI_API_KEY", "capabilities": ["chat", "summarise"]},
+    {"name": "llama3", "provider": "ollama", "endpoint": "http://localhost:11434",
+     "endpoint_secret": "OLLAMA_URL", "capabilities": ["chat", "summarise"]},
+    {"name": "codellama", "provider": "ollama", "endpoint": "http://localhost:11434",
+     "endpoint_secret": "OLLAMA_URL", "capabilities": ["code"]}
+]
+
+class ModelRegistry:
+    """
+    Models declared in ngahere_os.yaml / mauri/matua.yaml (matua wins on a
+    name clash), indexed by name, provider and capability for O(1) lookup.
+    Specs are parsed up front but a ModelConfig (and its Korito secrets) is
+    only built the first time a model is asked for. The manifests' mtimes are
+    checked at most once per reload_interval and the indexes rebuilt when they
+    change, so models can be added without a restart.
+    """
+
+    def __init__(self, manifest_paths: Optional[List[Path]] = None, reload_interval: float = 5.0):
+        self.manifest_paths = manifest_paths or [
+            NGAHERE_ROOT / "ngahere_os.yaml",
+            NGAHERE_ROOT / "mauri" / "matua.yaml"
+        ]
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self._checked_at = 0.0
+        self._specs: Dict[str, Dict] = {}
+        self._configs: Dict[str, ModelConfig] = {}
+        self._by_provider: Dict[AIProvider, List[str]] = {}
+        self._by_capability: Dict[str, List[str]] = {}
+        self.reload()
+
+    def _current_mtimes(self) -> Dict[str, Optional[float]]:
+        mtimes = {}
+        for path in self.manifest_paths:
+            try:
+                mtimes[str(path)] = path.stat().st_mtime
+            except OSError:
+                mtimes[str(path)] = None
+        return mtimes
+
+    @staticmethod
+    def _spec_problem(spec) -> Optional[str]:
+        """Why a models entry can't be used, or None if it can"""
+        if not isinstance(spec, dict):
+            return f"expected a mapping, got {spec!r}"
+        if not isinstance(spec.get("name"), str) or not spec["name"]:
+            return f"no name in {spec!r}"
+        if "provider" not in spec:
+            return f"model {spec['name']} has no provider"
+        if spec["provider"] not in {provider.value for provider in AIProvider}:
+            return f"model {spec['name']} has unknown provider {spec['provider']}"
+        if not isinstance(spec.get("capabilities") or [], list):
+            return f"model {spec['name']} has capabilities that are not a list"
+        return None
+
+    def _read_specs(self) -> Optional[List[Dict]]:
+        """Valid specs from every manifest (bad entries skipped), or None if a manifest can't be parsed"""
+        specs = {}
+        for path in self.manifest_paths:
+            if not path.exists():
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = yaml.safe_load(f) or {}
+                if not isinstance(manifest, dict) or not isinstance(manifest.get("models") or [], list):
+                    raise ValueError("expected a mapping with a list of models")
+            except Exception as e:
+                print(f"Cloud Kaitiaki could not read models from {path}: {e}")
+                return None
+            for spec in manifest.get("models") or []:
+                problem = self._spec_problem(spec)
+                if problem is not None:
+                    print(f"Cloud Kaitiaki skipped a model in {path}: {problem}")
+                    continue
+                specs[spec["name"]] = spec
+        return list(specs.values()) or DEFAULT_MODEL_SPECS
+
+    def reload(self):
+        """
+        Re-read the manifests and rebuild the indexes. If a manifest can't be
+        parsed the registry already loaded stays in place (the defaults on the
+        first load) until the file changes again.
+        """
+        mtimes = self._current_mtimes()
+        read = self._read_specs()
+        if read is None and self.reloads:
+            with self._lock:
+                self._mtimes = mtimes
+                self._checked_at = time.monotonic()
+            return
+        specs, by_provider, by_capability = {}, {}, {}
+        for spec in read or DEFAULT_MODEL_SPECS:
+            # Cloud models whose key is missing from Korito are not offered
+            if spec.get("api_key_secret") and not os.getenv(spec["api_key_secret"]):
+                continue
+            provider = AIProvider(spec["provider"])
+            specs[spec["name"]] = spec
+            by_provider.setdefault(provider, []).append(spec["name"])
+            for capability in spec.get("capabilities") or []:
+                by_capability.setdefault(capability, []).append(spec["name"])
+        with self._lock:
+            self._specs = specs
+            self._configs = {}
+            self._by_provider = by_provider
+            self._by_capability = by_capability
+            self._mtimes = mtimes
+            self._checked_at = time.monotonic()
+            self.reloads += 1
+
+    def _maybe_reload(self):
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = time.monotonic()
+        if self._current_mtimes() != self._mtimes:
+            self.reload()
+
+    def _build(self, spec: Dict) -> ModelConfig:
+        extra = {
+            key: value for key, value in spec.items()
+            if key not in ("name", "provider", "endpoint", "endpoint_secret", "api_key_secret",
+                           "max_tokens", "temperature", "capabilities")
+        }
+        endpoint = spec.get("endpoint", "")
+        if spec.get("endpoint_secret"):
+            endpoint = os.getenv(spec["endpoint_secret"]) or endpoint
+        return ModelConfig(
+            name=spec["name"],
+            provider=AIProvider(spec["provider"]),
+            endpoint=endpoint,
+            api_key=os.getenv(spec["api_key_secret"]) if spec.get("api_key_secret") else None,
+            capabilities=spec.get("capabilities"),
+            **{key: spec[key] for key in ("max_tokens", "temperature") if key in spec},
+            **extra
+        )
+
+    def get(self, name: str) -> Optional[ModelConfig]:
+        """Model config by name, built on first use"""
+        self._maybe_reload()
+        config = self._configs.get(name)
+        if config is None:
+            spec = self._specs.get(name)
+            if spec is None:
+                return None
+            config = self._configs.setdefault(name, self._build(spec))
+        return config
+
+    def __getitem__(self, name: str) -> ModelConfig:
+        config = self.get(name)
+        if config is None:
+            raise KeyError(name)
+        return config
+
+    def __contains__(self, name: str) -> bool:
+        self._maybe_reload()
+        return name in self._specs
+
+    def names(self) -> List[str]:
+        self._maybe_reload()
+        return list(self._specs)
+
+    def items(self):
+        return [(name, self.get(name)) for name in self.names()]
+
+    def by_provider(self, provider_type: AIProvider) -> List[ModelConfig]:
+        """Models served by a provider, in manifest order"""
+        self._maybe_reload()
+        return [self.get(name) for name in self._by_provider.get(provider_type, [])]
+
+    def by_capability(self, capability: str) -> List[ModelConfig]:
+        """Models declaring a capability, in manifest order"""
+        self._maybe_reload()
+        return [self.get(name) for name in self._by_capability.get(capability, [])]
+
+    def get_status(self) -> Dict:
+        return {
+            "models": len(self._specs),
+            "built": len(self._configs),
+            "by_provider": {provider.value: names for provider, names in self._by_provider.items()},
+            "by_capability": dict(self._by_capability),
+            "manifests": [str(path) for path in self.manifest_paths],
+            "reload_interval_seconds": self.reload_interval,
+            "reloads": self.reloads
+        }
+
+class PoolStats:
+    """Connection reuse and handshake counters for one endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.handshake_seconds = 0.0
+        self.errors = 0
+
+    def to_dict(self) -> Dict:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_rate": round(reused / self.requests, 4) if self.requests else 0.0,
+            "handshake_ms_total": round(self.handshake_seconds * 1000, 2),
+            "handshake_ms_avg": round(self.handshake_seconds * 1000 / self.new_connections, 2)
+            if self.new_connections else 0.0,
+            "errors": self.errors
+        }
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report TCP + TLS connect time"""
+
+    def __init__(self, on_connect, **kwargs):
+        self._on_connect = on_connect
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        on_connect = self._on_connect
+
+        class TimedHTTPConnection(HTTPConnection):
+            def connect(self):
+                start = time.perf_counter()
+                super().connect()
+                on_connect(time.perf_counter() - start)
+
+        class TimedHTTPSConnection(HTTPSConnection):
+            def connect(self):
+                start = time.perf_counter()
+                super().connect()
+                on_connect(time.perf_counter() - start)
+
+        class TimedHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = TimedHTTPConnection
+
+        class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = TimedHTTPSConnection
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool
+        }
+
+class HTTPSessionPool:
+    """
+    Shared keep-alive HTTP sessions, one per endpoint (scheme + host + port).
+    Every provider sends through here so TCP + TLS handshakes are paid once per
+    connection instead of once per generation.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 max_per_host: Optional[int] = None, keep_alive: bool = True):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_per_host = max_per_host
+        self.keep_alive = keep_alive
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, PoolStats] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _endpoint_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def session_for(self, url: str) -> requests.Session:
+        """Get (or open) the pooled session for the endpoint serving url"""
+        key = self._endpoint_key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                stats = self._stats.setdefault(key, PoolStats())
+
+                def on_connect(seconds: float, stats=stats):
+                    with self._lock:
+                        stats.new_connections += 1
+                        stats.handshake_seconds += seconds
+
+                # A per-host limit blocks callers instead of opening extra sockets
+                adapter = _TimedAdapter(
+                    on_connect,
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.max_per_host or self.pool_maxsize,
+                    pool_block=self.max_per_host is not None
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                if not self.keep_alive:
+                    session.headers["Connection"] = "close"
+                self._sessions[key] = session
+            return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request over the endpoint's pooled session"""
+        session = self.session_for(url)
+        stats = self._stats[self._endpoint_key(url)]
+        with self._lock:
+            stats.requests += 1
+        try:
+            return session.request(method, url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                stats.errors += 1
+            raise
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get_stats(self) -> Dict:
+        """Reuse rate and handshake time, overall and per endpoint"""
+        total = PoolStats()
+        with self._lock:
+            endpoints = {key: stats.to_dict() for key, stats in self._stats.items()}
+            for stats in self._stats.values():
+                total.requests += stats.requests
+                total.new_connections += stats.new_connections
+                total.handshake_seconds += stats.handshake_seconds
+                total.errors += stats.errors
+        return {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "max_per_host": self.max_per_host,
+            "keep_alive": self.keep_alive,
+            "totals": total.to_dict(),
+            "endpoints": endpoints
+        }
+
+    def close(self):
+        """Close every pooled session"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+def _int_secret(key: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(key)
+    return int(value) if value else default
+
+# Global session pool shared by every provider
+session_pool = HTTPSessionPool(
+    pool_connections=_int_secret("CLOUD_POOL_CONNECTIONS", 10),
+    pool_maxsize=_int_secret("CLOUD_POOL_MAXSIZE", 10),
+    max_per_host=_int_secret("CLOUD_POOL_MAX_PER_HOST", None),
+    keep_alive=(os.getenv("CLOUD_POOL_KEEP_ALIVE") or "true").lower() != "false"
+)
+
 class AIProviderInterface(ABC):
     """Abstract interface for AI providers"""
     
+    def __init__(self, pool: Optional[HTTPSessionPool] = None):
+        self.pool = pool or session_pool
+    
     @abstractmethod
     def generate(self, prompt: str, model_config: ModelConfig) -> str:
         pass
@@ -51,22 +422,31 @@ class AIProviderInterface(ABC):
 class OpenAIProvider(AIProviderInterface):
     """OpenAI API provider"""
     
+    timeout = 30
+    
+    @staticmethod
+    def _request(prompt: str, model_config: ModelConfig, stream: bool = False) -> Dict:
+        """URL, headers and body for a chat completion (shared with the async provider)"""
+        request = {
+            "url": f"{model_config.endpoint}/v1/chat/completions",
+            "headers": {
+                "Authorization": f"Bearer {model_config.api_key}",
+                "Content-Type": "application/json"
+            },
+            "json": {
+                "model": model_config.name,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": model_config.max_tokens,
+                "temperature": model_config.temperature
+            }
+        }
+        if stream:
+            request["json"]["stream"] = True
+        return request
+    
     def generate(self, prompt: str, model_config: ModelConfig) -> str:
         try:
-            response = requests.post(
-                f"{model_config.endpoint}/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {model_config.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": model_config.name,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": model_config.max_tokens,
-                    "temperature": model_config.temperature
-                },
-                timeout=30
-            )
+            response = self.pool.post(timeout=self.timeout, **self._request(prompt, model_config))
             
             if response.status_code == 200:
                 return response.json()["choices"][0]["message"]["content"]
@@ -77,26 +457,37 @@ class OpenAIProvider(AIProviderInterface):
             raise Exception(f"OpenAI generation failed: {str(e)}")
     
     def is_available(self) -> bool:
-        return get_korito_secret("OPENAI_API_KEY") is not None
+        return bool(os.getenv("OPENAI_API_KEY"))
 
 class OllamaProvider(AIProviderInterface):
     """Ollama local provider"""
     
+    timeout = 120
+    
+    @staticmethod
+    def _request(prompt: str, model_config: ModelConfig, stream: bool = False) -> Dict:
+        """URL and body for a generation (shared with the async provider)"""
+        return {
+            "url": f"{model_config.endpoint}/api/generate",
+            "json": {
+                "model": model_config.name,
+                "prompt": prompt,
+                "stream": stream,
+                "options": {
+                    "temperature": model_config.temperature,
+                    "num_predict": model_config.max_tokens
+                }
+            }
+        }
+    
+    @staticmethod
+    def _tags_url() -> str:
+        ollama_url = os.getenv("OLLAMA_URL") or "http://localhost:11434"
+        return f"{ollama_url}/api/tags"
+    
     def generate(self, prompt: str, model_config: ModelConfig) -> str:
         try:
-            response = requests.post(
-                f"{model_config.endpoint}/api/generate",
-                json={
-                    "model": model_config.name,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": model_config.temperature,
-                        "num_predict": model_config.max_tokens
-                    }
-                },
-                timeout=120
-            )
+            response = self.pool.post(timeout=self.timeout, **self._request(prompt, model_config))
             
             if response.status_code == 200:
                 return response.json().get("response", "No response from Ollama")
@@ -108,12 +499,355 @@ class OllamaProvider(AIProviderInterface):
     
     def is_available(self) -> bool:
         try:
-            ollama_url = get_korito_secret("OLLAMA_URL") or "http://localhost:11434"
-            response = requests.get(f"{ollama_url}/api/tags", timeout=5)
+            response = self.pool.get(self._tags_url(), timeout=5)
             return response.status_code == 200
         except:
             return False
 
+class AsyncHTTPSessionPool:
+    """
+    Async counterpart to HTTPSessionPool: one keep-alive httpx.AsyncClient per
+    endpoint and event loop. A client can only be used on the loop that opened
+    it, so each loop gets its own, and those of loops that have since closed
+    (e.g. each asyncio.run) are dropped.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive: int = 10,
+                 keep_alive: bool = True):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keep_alive = keep_alive
+        self._clients: Dict[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]] = {}
+        self._stats: Dict[str, PoolStats] = {}
+        self._lock = threading.Lock()
+
+    def _loop_clients(self) -> Dict[str, httpx.AsyncClient]:
+        """Clients of the running loop, forgetting those of closed loops"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for closed in [other for other in self._clients if other.is_closed()]:
+                del self._clients[closed]
+            return self._clients.setdefault(loop, {})
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Get (or open) the running loop's pooled client for the endpoint serving url"""
+        key = HTTPSessionPool._endpoint_key(url)
+        clients = self._loop_clients()
+        client = clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive if self.keep_alive else 0
+                )
+            )
+            clients[key] = client
+            self._stats.setdefault(key, PoolStats())
+        return client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request over the endpoint's pooled client"""
+        client = self.client_for(url)
+        stats = self._stats[HTTPSessionPool._endpoint_key(url)]
+        stats.requests += 1
+        try:
+            return await client.request(method, url, extensions={"trace": self._trace(stats)}, **kwargs)
+        except httpx.HTTPError:
+            stats.errors += 1
+            raise
+
+    @staticmethod
+    def _trace(stats: PoolStats):
+        """httpcore trace hook counting new connections and their handshake time"""
+        marks = {}
+
+        async def trace(event_name: str, info: Dict):
+            # TCP connect, then TLS for https, together make up the handshake
+            if event_name == "connection.connect_tcp.started":
+                stats.new_connections += 1
+                marks["started"] = time.perf_counter()
+            elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+                now = time.perf_counter()
+                stats.handshake_seconds += now - marks.get("started", now)
+                marks["started"] = now
+
+        return trace
+
+    def stream(self, method: str, url: str, **kwargs):
+        """Streamed request over the pooled client (use with async with)"""
+        client = self.client_for(url)
+        stats = self._stats[HTTPSessionPool._endpoint_key(url)]
+        stats.requests += 1
+        return client.stream(method, url, extensions={"trace": self._trace(stats)}, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def get_stats(self) -> Dict:
+        """Reuse rate and handshake time, overall and per endpoint"""
+        total = PoolStats()
+        for stats in self._stats.values():
+            total.requests += stats.requests
+            total.new_connections += stats.new_connections
+            total.handshake_seconds += stats.handshake_seconds
+            total.errors += stats.errors
+        return {
+            "max_connections": self.max_connections,
+            "max_keepalive": self.max_keepalive,
+            "keep_alive": self.keep_alive,
+            "totals": total.to_dict(),
+            "endpoints": {key: stats.to_dict() for key, stats in self._stats.items()}
+        }
+
+    async def aclose(self):
+        """Close the running loop's pooled clients"""
+        clients = self._loop_clients()
+        for client in clients.values():
+            await client.aclose()
+        clients.clear()
+
+# Global async pool shared by every async provider
+async_session_pool = AsyncHTTPSessionPool(
+    max_connections=_int_secret("CLOUD_ASYNC_MAX_CONNECTIONS", 100),
+    max_keepalive=_int_secret("CLOUD_POOL_MAXSIZE", 10),
+    keep_alive=session_pool.keep_alive
+)
+
+class AsyncAIProviderInterface(ABC):
+    """Abstract asyncio interface for AI providers"""
+    
+    def __init__(self, pool: Optional[AsyncHTTPSessionPool] = None):
+        self.pool = pool or async_session_pool
+    
+    @abstractmethod
+    async def agenerate(self, prompt: str, model_config: ModelConfig) -> str:
+        pass
+    
+    @abstractmethod
+    async def ais_available(self) -> bool:
+        pass
+    
+    @abstractmethod
+    def astream(self, prompt: str, model_config: ModelConfig) -> AsyncIterator[str]:
+        """Yield text chunks as the provider produces them"""
+        pass
+
+class AsyncOpenAIProvider(AsyncAIProviderInterface):
+    """OpenAI API provider (asyncio)"""
+    
+    async def agenerate(self, prompt: str, model_config: ModelConfig) -> str:
+        try:
+            response = await self.pool.post(
+                timeout=OpenAIProvider.timeout, **OpenAIProvider._request(prompt, model_config)
+            )
+            
+            if response.status_code == 200:
+                return response.json()["choices"][0]["message"]["content"]
+            else:
+                raise Exception(f"OpenAI API error: {response.text}")
+                
+        except Exception as e:
+            raise Exception(f"OpenAI generation failed: {str(e)}")
+    
+    async def astream(self, prompt: str, model_config: ModelConfig) -> AsyncIterator[str]:
+        """Stream a chat completion, parsing OpenAI's server-sent events"""
+        request = OpenAIProvider._request(prompt, model_config, stream=True)
+        try:
+            async with self.pool.stream("POST", timeout=OpenAIProvider.timeout, **request) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise Exception(f"OpenAI API error: {body.decode(errors='replace')}")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                    if delta.get("content"):
+                        yield delta["content"]
+        except Exception as e:
+            raise Exception(f"OpenAI streaming failed: {str(e)}")
+    
+    async def ais_available(self) -> bool:
+        return bool(os.getenv("OPENAI_API_KEY"))
+
+class AsyncOllamaProvider(AsyncAIProviderInterface):
+    """Ollama local provider (asyncio)"""
+    
+    async def agenerate(self, prompt: str, model_config: ModelConfig) -> str:
+        try:
+            response = await self.pool.post(
+                timeout=OllamaProvider.timeout, **OllamaProvider._request(prompt, model_config)
+            )
+            
+            if response.status_code == 200:
+                return response.json().get("response", "No response from Ollama")
+            else:
+                raise Exception(f"Ollama API error: {response.text}")
+                
+        except Exception as e:
+            raise Exception(f"Ollama generation failed: {str(e)}")
+    
+    async def astream(self, prompt: str, model_config: ModelConfig) -> AsyncIterator[str]:
+        """Stream a generation, parsing Ollama's newline-delimited JSON"""
+        request = OllamaProvider._request(prompt, model_config, stream=True)
+        try:
+            async with self.pool.stream("POST", timeout=OllamaProvider.timeout, **request) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise Exception(f"Ollama API error: {body.decode(errors='replace')}")
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise Exception(chunk["error"])
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+        except Exception as e:
+            raise Exception(f"Ollama streaming failed: {str(e)}")
+    
+    async def ais_available(self) -> bool:
+        try:
+            response = await self.pool.get(OllamaProvider._tags_url(), timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+class ProviderHealth:
+    """Cached availability of one provider"""
+
+    def __init__(self):
+        self.available: Optional[bool] = None
+        self.checked_at = 0.0
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+
+    def to_dict(self, ttl: float) -> Dict:
+        age = time.monotonic() - self.checked_at if self.checked_at else None
+        if self.available is None:
+            state = "unknown"
+        else:
+            state = "up" if self.available else "down"
+        return {
+            "state": state,
+            "age_seconds": round(age, 2) if age is not None else None,
+            "stale": age is None or age > ttl,
+            "last_error": self.last_error,
+            "consecutive_failures": self.consecutive_failures
+        }
+
+class ProviderHealthRegistry:
+    """
+    Cached provider availability for CloudKaitiaki.
+    A background thread runs the providers' is_available() probes every
+    probe_interval seconds; the request path only ever reads the cache.
+    A provider is marked down as soon as a generation failure opens its
+    circuit breaker, so one bad request does not take it out of rotation.
+    """
+
+    def __init__(self, providers: Dict[AIProvider, AIProviderInterface],
+                 ttl: float = 30.0, probe_interval: float = 15.0):
+        self.providers = providers
+        self.ttl = ttl
+        self.probe_interval = probe_interval
+        self._health = {provider_type: ProviderHealth() for provider_type in providers}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_available(self, provider_type: AIProvider) -> bool:
+        """Cached availability - never probes on the caller's thread"""
+        health = self._health.get(provider_type)
+        if health is None:
+            return False
+        if not health.checked_at or time.monotonic() - health.checked_at > self.ttl:
+            self._wake.set()
+        # Unknown providers are tried optimistically; a failure that opens the breaker marks them down
+        return health.available is not False
+
+    def mark_down(self, provider_type: AIProvider, error: Optional[str] = None):
+        """Mark a provider down straight after generation failures open its breaker"""
+        with self._lock:
+            health = self._health[provider_type]
+            health.available = False
+            health.checked_at = time.monotonic()
+            health.last_error = error
+            health.consecutive_failures += 1
+
+    def mark_up(self, provider_type: AIProvider):
+        """Record a successful generation"""
+        with self._lock:
+            health = self._health[provider_type]
+            health.available = True
+            health.checked_at = time.monotonic()
+            health.last_error = None
+            health.consecutive_failures = 0
+
+    def refresh(self, provider_type: Optional[AIProvider] = None):
+        """Run the probes now (called from the background thread)"""
+        targets = [provider_type] if provider_type else list(self.providers)
+        for target in targets:
+            try:
+                available = self.providers[target].is_available()
+                error = None if available else "probe reported unavailable"
+            except Exception as e:
+                available, error = False, str(e)
+            with self._lock:
+                health = self._health[target]
+                health.available = available
+                health.checked_at = time.monotonic()
+                health.last_error = error
+                health.consecutive_failures = 0 if available else health.consecutive_failures + 1
+
+    def _probe_loop(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._wake.wait(self.probe_interval)
+            self._wake.clear()
+
+    def start(self):
+        """Start the background probe thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._probe_loop, name="cloud-kaitiaki-health", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background probe thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            providers = {
+                provider_type.value: health.to_dict(self.ttl)
+                for provider_type, health in self._health.items()
+            }
+        return {
+            "ttl_seconds": self.ttl,
+            "probe_interval_seconds": self.probe_interval,
+            "probing": bool(self._thread and self._thread.is_alive()),
+            "providers": providers
+        }
+
+def _float_secret(key: str, default: float) -> float:
+    value = os.getenv(key)
+    return float(value) if value else default
+
 class CloudKaitiaki:
     """
     Cloud Kaitiaki - Intelligent model provider with automatic fallback
@@ -121,91 +855,448 @@ class CloudKaitiaki:
     
     def __init__(self):
         self.name = "Cloud Kaitiaki"
+        self.pool = session_pool
         self.providers = {
-            AIProvider.OPENAI: OpenAIProvider(),
-            AIProvider.OLLAMA: OllamaProvider()
+            AIProvider.OPENAI: OpenAIProvider(self.pool),
+            AIProvider.OLLAMA: OllamaProvider(self.pool)
         }
-        self.model_configs = self._load_model_configs()
+        self.async_pool = async_session_pool
+        self.async_providers = {
+            AIProvider.OPENAI: AsyncOpenAIProvider(self.async_pool),
+            AIProvider.OLLAMA: AsyncOllamaProvider(self.async_pool)
+        }
+        self.health = ProviderHealthRegistry(
+            self.providers,
+            ttl=_float_secret("CLOUD_HEALTH_TTL", 30.0),
+            probe_interval=_float_secret("CLOUD_HEALTH_PROBE_INTERVAL", 15.0)
+        )
+        self.health.start()
+        self.registry = ModelRegistry(reload_interval=_float_secret("CLOUD_MODELS_RELOAD_INTERVAL", 5.0))
         self.current_provider = None
         self.fallback_chain = [AIProvider.OPENAI, AIProvider.OLLAMA]
-    
-    def _load_model_configs(self) -> Dict[str, ModelConfig]:
-        """Load model configurations from Korito's heart"""
-        configs = {}
-        
-        # OpenAI models (from Korito)
-        openai_key = get_korito_secret("OPENAI_API_KEY")
-        if openai_key:
-            configs["gpt-4"] = ModelConfig(
-                name="gpt-4",
-                provider=AIProvider.OPENAI,
-                endpoint="https://api.openai.com",
-                api_key=openai_key
-            )
-            configs["gpt-3.5-turbo"] = ModelConfig(
-                name="gpt-3.5-turbo",
-                provider=AIProvider.OPENAI,
-                endpoint="https://api.openai.com",
-                api_key=openai_key
-            )
         
-        # Ollama models (from Korito)
-        ollama_url = get_korito_secret("OLLAMA_URL") or "http://localhost:11434"
-        configs["llama3"] = ModelConfig(
-            name="llama3",
-            provider=AIProvider.OLLAMA,
-            endpoint=ollama_url
+        # Hedged fallback: once the running provider passes its latency
+        # percentile, the next provider in the chain is raced against it
+        self.latency = {provider_type: LatencyHistogram() for provider_type in self.providers}
+        self.guards = {provider_type: self._new_guard(provider_type) for provider_type in self.providers}
+        self.hedge_enabled = (os.getenv("CLOUD_HEDGE_ENABLED") or "false").lower() == "true"
+        self.hedge_percentile = _float_secret("CLOUD_HEDGE_PERCENTILE", 95.0)
+        self.hedge_default_delay = _float_secret("CLOUD_HEDGE_DELAY", 2.0)
+        self.hedge_min_samples = _int_secret("CLOUD_HEDGE_MIN_SAMPLES", 20)
+        self.hedge_stats = {"hedged_requests": 0, "hedges_launched": 0, "hedge_wins": 0}
+        # Threads are only started as hedged requests need them
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=_int_secret("CLOUD_HEDGE_WORKERS", 16),
+            thread_name_prefix="cloud-kaitiaki-hedge"
         )
-        configs["codellama"] = ModelConfig(
-            name="codellama",
-            provider=AIProvider.OLLAMA,
-            endpoint=ollama_url
+        
+        self.cache_enabled = (os.getenv("CLOUD_CACHE_ENABLED") or "true").lower() != "false"
+        self.cache = ResponseCache(
+            max_entries=_int_secret("CLOUD_CACHE_MAX_ENTRIES", 1024),
+            ttl=_float_secret("CLOUD_CACHE_TTL", 3600.0),
+            sqlite_path=os.getenv("CLOUD_CACHE_SQLITE_PATH") or None,
+            disk_max_entries=_int_secret("CLOUD_CACHE_DISK_MAX_ENTRIES", 100_000),
+            allow_nondeterministic=(os.getenv("CLOUD_CACHE_NONDETERMINISTIC") or "false").lower() == "true"
         )
         
-        return configs
+        # Concurrent identical cacheable generations share one provider call
+        self.coalesce_enabled = (os.getenv("CLOUD_COALESCE_ENABLED") or "true").lower() != "false"
+        self.flights = SingleFlight()
+    
+    @staticmethod
+    def _new_guard(provider_type: AIProvider) -> ProviderGuard:
+        """Circuit breaker and AIMD limiter for one provider, tuned from Korito"""
+        return ProviderGuard(
+            provider_type.value,
+            CircuitBreaker(
+                failure_threshold=_int_secret("CLOUD_BREAKER_FAILURES", 5),
+                recovery_timeout=_float_secret("CLOUD_BREAKER_RECOVERY", 30.0),
+                half_open_max_calls=_int_secret("CLOUD_BREAKER_HALF_OPEN_CALLS", 1),
+                success_threshold=_int_secret("CLOUD_BREAKER_SUCCESSES", 1)
+            ),
+            AdaptiveConcurrencyLimiter(
+                initial_limit=_int_secret("CLOUD_LIMIT_INITIAL", 10),
+                min_limit=_int_secret("CLOUD_LIMIT_MIN", 1),
+                max_limit=_int_secret("CLOUD_LIMIT_MAX", 100),
+                backoff=_float_secret("CLOUD_LIMIT_BACKOFF", 0.7),
+                latency_tolerance=_float_secret("CLOUD_LIMIT_LATENCY_TOLERANCE", 2.0)
+            )
+        )
+    
+    def models_for(self, capability: str) -> List[str]:
+        """Available models declaring a capability (e.g. "summarise", "code")"""
+        return [
+            config.name for config in self.registry.by_capability(capability)
+            if self.health.is_available(config.provider)
+        ]
     
     def get_available_models(self) -> List[str]:
         """Get list of available models"""
         available = []
-        for name, config in self.model_configs.items():
-            provider = self.providers[config.provider]
-            if provider.is_available():
+        for name, config in self.registry.items():
+            if self.health.is_available(config.provider):
                 available.append(name)
         return available
     
-    def generate_with_fallback(self, prompt: str, preferred_model: str = None) -> str:
-        """Generate text with automatic fallback between providers"""
+    def _release(self, config: ModelConfig, elapsed: float, success: Optional[bool], error: Optional[str] = None):
+        """Return a provider slot; a failure that opens the breaker also marks the provider down"""
+        guard = self.guards[config.provider]
+        guard.release(elapsed, success)
+        if success is False and guard.breaker.state == CircuitBreaker.OPEN:
+            self.health.mark_down(config.provider, error)
+    
+    def _generate(self, prompt: str, config: ModelConfig) -> str:
+        """
+        Generate with one model behind its provider guard, keeping the health
+        registry and latency current. Raises ProviderRejected straight away
+        when the breaker is open or the concurrency limit is reached.
+        """
+        guard = self.guards[config.provider]
+        guard.admit()
+        started = time.perf_counter()
+        success, error = None, None
+        try:
+            result = self.providers[config.provider].generate(prompt, config)
+            success = True
+        except Exception as e:
+            success, error = False, str(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self._release(config, elapsed, success, error)
+        self.latency[config.provider].record(elapsed)
+        self.health.mark_up(config.provider)
+        return result
+    
+    def generate_batch(self, prompts: List[str], model: str = None,
+                       max_concurrency: int = 8) -> List[Dict]:
+        """
+        Generate for many prompts with at most max_concurrency in flight.
+        Results come back in prompt order as {"index", "result", "error"};
+        one failing prompt does not fail the batch.
+        """
+        if not prompts:
+            return []
+        
+        def run(item) -> Dict:
+            index, prompt = item
+            try:
+                return {"index": index, "result": self.generate_with_fallback(prompt, model), "error": None}
+            except Exception as e:
+                return {"index": index, "result": None, "error": str(e)}
+        
+        workers = max(1, min(max_concurrency, len(prompts)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cloud-kaitiaki-batch") as executor:
+            return list(executor.map(run, enumerate(prompts)))
+    
+    async def agenerate_batch(self, prompts: List[str], model: str = None,
+                              max_concurrency: int = 8) -> List[Dict]:
+        """Async generate_batch, bounded by a semaphore instead of threads"""
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def run(index: int, prompt: str) -> Dict:
+            async with semaphore:
+                try:
+                    result = await self.agenerate_with_fallback(prompt, model)
+                    return {"index": index, "result": result, "error": None}
+                except Exception as e:
+                    return {"index": index, "result": None, "error": str(e)}
+        
+        return list(await asyncio.gather(*(run(index, prompt) for index, prompt in enumerate(prompts))))
+    
+    def _candidates(self, preferred_model: str = None) -> List[ModelConfig]:
+        """Preferred model first, then the fallback chain, skipping providers marked down"""
+        candidates = []
+        if preferred_model and preferred_model in self.registry:
+            candidates.append(self.registry[preferred_model])
+        for provider_type in self.fallback_chain:
+            for config in self.registry.by_provider(provider_type):
+                if config not in candidates:
+                    candidates.append(config)
+        return [config for config in candidates if self.health.is_available(config.provider)]
+    
+    def hedge_delay(self, provider_type: AIProvider) -> float:
+        """Seconds to wait on a provider before racing the next one"""
+        histogram = self.latency[provider_type]
+        if histogram.count < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return histogram.percentile(self.hedge_percentile)
+    
+    @staticmethod
+    def _next_candidate(remaining: List[ModelConfig], in_flight: List[ModelConfig],
+                        hedging: bool) -> Optional[ModelConfig]:
+        """Next model to start; a hedge must go to a provider not already running"""
+        busy = {config.provider for config in in_flight}
+        for config in remaining:
+            if not hedging or config.provider not in busy:
+                return config
+        return None
+    
+    @staticmethod
+    def _generation_key(prompt: str, config: ModelConfig) -> str:
+        """Content address of a request as one model would answer it"""
+        return ResponseCache.make_key(config.name, prompt, config.temperature, config.max_tokens)
+    
+    def _cache_lookup(self, prompt: str, preferred_model: str = None,
+                      use_cache: Optional[bool] = None) -> Optional[str]:
+        """
+        Key of the model that would answer first, or None when the request
+        skips the cache (disabled, opted out, sampled without an opt-in, or no
+        model available)
+        """
+        if not self.cache_enabled or use_cache is False:
+            return None
+        candidates = self._candidates(preferred_model)
+        if not candidates or not self.cache.should_cache(candidates[0].temperature, use_cache):
+            return None
+        return self._generation_key(prompt, candidates[0])
+    
+    def generate_with_fallback(self, prompt: str, preferred_model: str = None,
+                               hedge: Optional[bool] = None, use_cache: Optional[bool] = None) -> str:
+        """
+        Generate text with automatic fallback between providers.
+        Deterministic requests are answered from the response cache when possible;
+        use_cache=True opts a sampled (temperature > 0) request in, False skips the cache.
+        Answers are stored under the model that gave them. Concurrent identical
+        cacheable requests share one provider call.
+        """
+        key = self._cache_lookup(prompt, preferred_model, use_cache)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        def generate():
+            return self._generate_with_fallback(prompt, preferred_model, hedge)
+        
+        # Requests that bypass the cache are sampled and must not share an answer
+        coalesce = self.coalesce_enabled and key is not None
+        config, result = self.flights.do(key, generate) if coalesce else generate()
+        if key is not None:
+            self.cache.set(self._generation_key(prompt, config), result)
+        return result
+    
+    def _generate_with_fallback(self, prompt: str, preferred_model: str = None,
+                                hedge: Optional[bool] = None):
+        """Generate text with automatic fallback between providers; returns (model config, text)"""
+        if self.hedge_enabled if hedge is None else hedge:
+            return self._generate_hedged(prompt, preferred_model)
         
         # Try preferred model first
-        if preferred_model and preferred_model in self.model_configs:
-            config = self.model_configs[preferred_model]
-            provider = self.providers[config.provider]
+        if preferred_model and preferred_model in self.registry:
+            config = self.registry[preferred_model]
             
-            if provider.is_available():
+            if self.health.is_available(config.provider):
                 try:
-                    return provider.generate(prompt, config)
+                    return config, self._generate(prompt, config)
                 except Exception as e:
                     print(f"Preferred model {preferred_model} failed: {e}")
         
         # Try fallback chain
         for provider_type in self.fallback_chain:
-            for name, config in self.model_configs.items():
-                if config.provider == provider_type:
-                    provider = self.providers[provider_type]
-                    if provider.is_available():
-                        try:
-                            return provider.generate(prompt, config)
-                        except Exception as e:
-                            print(f"Provider {provider_type} failed: {e}")
-                            continue
+            for config in self.registry.by_provider(provider_type):
+                if self.health.is_available(provider_type):
+                    try:
+                        return config, self._generate(prompt, config)
+                    except Exception as e:
+                        print(f"Provider {provider_type} failed: {e}")
+                        continue
+        
+        raise Exception("No available AI providers found")
+    
+    def _generate_hedged(self, prompt: str, preferred_model: str = None):
+        """
+        Race the fallback chain: start the first model, and each time the newest
+        one outlives its hedge delay start the next provider alongside it.
+        The first good answer wins; losers that have not started are cancelled
+        and the rest are left to finish in the background.
+        """
+        self.hedge_stats["hedged_requests"] += 1
+        remaining = self._candidates(preferred_model)
+        futures = {}
+        first = remaining[0] if remaining else None
+        
+        def launch(hedging: bool) -> bool:
+            config = self._next_candidate(remaining, list(futures.values()), hedging)
+            if config is None:
+                return False
+            remaining.remove(config)
+            futures[self._hedge_executor.submit(self._generate, prompt, config)] = config
+            return True
+        
+        launch(False)
+        while futures:
+            newest = list(futures.values())[-1]
+            can_hedge = self._next_candidate(remaining, list(futures.values()), True) is not None
+            delay = self.hedge_delay(newest.provider) if can_hedge else None
+            done, _ = wait(futures, timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                if launch(True):
+                    self.hedge_stats["hedges_launched"] += 1
+                continue
+            for future in done:
+                config = futures.pop(future)
+                if future.exception() is None:
+                    for loser in futures:
+                        loser.cancel()
+                    if config is not first:
+                        self.hedge_stats["hedge_wins"] += 1
+                    return config, future.result()
+                print(f"Provider {config.provider} failed: {future.exception()}")
+            launch(False)
+        
+        raise Exception("No available AI providers found")
+    
+    async def _agenerate(self, prompt: str, config: ModelConfig) -> str:
+        """Async _generate; a cancelled call (e.g. a hedge loser) frees its slot without penalty"""
+        guard = self.guards[config.provider]
+        guard.admit()
+        started = time.perf_counter()
+        success, error = None, None
+        try:
+            result = await self.async_providers[config.provider].agenerate(prompt, config)
+            success = True
+        except Exception as e:
+            success, error = False, str(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self._release(config, elapsed, success, error)
+        self.latency[config.provider].record(elapsed)
+        self.health.mark_up(config.provider)
+        return result
+    
+    async def agenerate_with_fallback(self, prompt: str, preferred_model: str = None,
+                                      hedge: Optional[bool] = None, use_cache: Optional[bool] = None) -> str:
+        """Async generate_with_fallback - never blocks the event loop (the SQLite cache tier runs in a thread)"""
+        key = self._cache_lookup(prompt, preferred_model, use_cache)
+        if key is not None:
+            cached = await self._cache_call(self.cache.get, key)
+            if cached is not None:
+                return cached
+        
+        def generate():
+            return self._agenerate_with_fallback(prompt, preferred_model, hedge)
+        
+        coalesce = self.coalesce_enabled and key is not None
+        config, result = await (self.flights.ado(key, generate) if coalesce else generate())
+        if key is not None:
+            await self._cache_call(self.cache.set, self._generation_key(prompt, config), result)
+        return result
+    
+    async def _cache_call(self, method, *args):
+        """Cache get / set, off the event loop when there is a disk tier to touch"""
+        if self.cache.sqlite_path:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+    
+    async def _agenerate_with_fallback(self, prompt: str, preferred_model: str = None,
+                                       hedge: Optional[bool] = None):
+        """Async _generate_with_fallback"""
+        if self.hedge_enabled if hedge is None else hedge:
+            return await self._agenerate_hedged(prompt, preferred_model)
+        
+        if preferred_model and preferred_model in self.registry:
+            config = self.registry[preferred_model]
+            
+            if self.health.is_available(config.provider):
+                try:
+                    return config, await self._agenerate(prompt, config)
+                except Exception as e:
+                    print(f"Preferred model {preferred_model} failed: {e}")
+        
+        for provider_type in self.fallback_chain:
+            for config in self.registry.by_provider(provider_type):
+                if self.health.is_available(provider_type):
+                    try:
+                        return config, await self._agenerate(prompt, config)
+                    except Exception as e:
+                        print(f"Provider {provider_type} failed: {e}")
+                        continue
+        
+        raise Exception("No available AI providers found")
+    
+    async def _agenerate_hedged(self, prompt: str, preferred_model: str = None):
+        """Async _generate_hedged; losing requests are cancelled outright"""
+        self.hedge_stats["hedged_requests"] += 1
+        remaining = self._candidates(preferred_model)
+        tasks = {}
+        first = remaining[0] if remaining else None
+        
+        def launch(hedging: bool) -> bool:
+            config = self._next_candidate(remaining, list(tasks.values()), hedging)
+            if config is None:
+                return False
+            remaining.remove(config)
+            tasks[asyncio.ensure_future(self._agenerate(prompt, config))] = config
+            return True
+        
+        launch(False)
+        try:
+            while tasks:
+                newest = list(tasks.values())[-1]
+                can_hedge = self._next_candidate(remaining, list(tasks.values()), True) is not None
+                delay = self.hedge_delay(newest.provider) if can_hedge else None
+                done, _ = await asyncio.wait(tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch(True):
+                        self.hedge_stats["hedges_launched"] += 1
+                    continue
+                for task in done:
+                    config = tasks.pop(task)
+                    if task.exception() is None:
+                        if config is not first:
+                            self.hedge_stats["hedge_wins"] += 1
+                        return config, task.result()
+                    print(f"Provider {config.provider} failed: {task.exception()}")
+                launch(False)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        
+        raise Exception("No available AI providers found")
+    
+    async def astream_with_fallback(self, prompt: str, preferred_model: str = None) -> AsyncIterator[Dict]:
+        """
+        Stream a generation as {"model", "chunk"} dicts.
+        Falls back to the next model only until the first chunk is out; after
+        that the caller already holds partial output, so errors are raised.
+        """
+        for config in self._candidates(preferred_model):
+            provider = self.async_providers[config.provider]
+            guard = self.guards[config.provider]
+            try:
+                guard.admit()
+            except ProviderRejected as e:
+                print(f"Streaming with {config.name} skipped: {e}")
+                continue
+            started = False
+            success, error = None, None
+            begun = time.perf_counter()
+            try:
+                async for chunk in provider.astream(prompt, config):
+                    started = True
+                    yield {"model": config.name, "chunk": chunk}
+                success = True
+            except Exception as e:
+                success, error = False, str(e)
+                if started:
+                    raise
+                print(f"Streaming with {config.name} failed: {e}")
+                continue
+            finally:
+                self._release(config, time.perf_counter() - begun, success, error)
+            self.health.mark_up(config.provider)
+            return
         
         raise Exception("No available AI providers found")
     
     def switch_provider(self, provider_type: AIProvider) -> bool:
         """Manually switch to a specific provider"""
         if provider_type in self.providers:
-            provider = self.providers[provider_type]
-            if provider.is_available():
+            if self.health.is_available(provider_type):
                 self.current_provider = provider_type
                 return True
         return False
@@ -219,10 +1310,33 @@ class CloudKaitiaki:
             "current_provider": self.current_provider.value if self.current_provider else None
         }
         
-        for provider_type, provider in self.providers.items():
-            if provider.is_available():
+        for provider_type in self.providers:
+            if self.health.is_available(provider_type):
                 status["available_providers"].append(provider_type.value)
         
         status["available_models"] = self.get_available_models()
+        status["provider_health"] = self.health.get_status()
+        status["model_registry"] = self.registry.get_status()
+        status["latency"] = {
+            provider_type.value: histogram.to_dict()
+            for provider_type, histogram in self.latency.items()
+        }
+        status["hedging"] = {
+            "enabled": self.hedge_enabled,
+            "percentile": self.hedge_percentile,
+            "delays_seconds": {
+                provider_type.value: round(self.hedge_delay(provider_type), 4)
+                for provider_type in self.providers
+            },
+            **self.hedge_stats
+        }
+        status["response_cache"] = {"enabled": self.cache_enabled, **self.cache.get_stats()}
+        status["provider_guards"] = {
+            provider_type.value: guard.get_status()
+            for provider_type, guard in self.guards.items()
+        }
+        status["coalescing"] = {"enabled": self.coalesce_enabled, **self.flights.get_stats()}
+        status["connection_pool"] = self.pool.get_stats()
+        status["async_connection_pool"] = self.async_pool.get_stats()
         
         return status
@@ -0,0 +1,430 @@
+"""
+Jobs - Durable job queue with a process worker pool
+Long-running kaitiaki work (OCR scans, summaries, embeddings) is
+submitted as a job, stored in SQLite and picked up by worker processes, so an
+HTTP request only ever pays for an insert. Jobs carry a priority, are retried
+with exponential backoff, survive restarts and can be cancelled while queued
+or running.
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+import importlib
+import traceback
+import multiprocessing
+from pathlib import Path
+
+import psutil
+from typing import Any, Callable, Dict, List, Optional
+
+# Job kind -> "module:Class.method" (called on one kaitiaki per worker process) or "module:function".
+# Payloads are the keyword arguments; results must be JSON-serialisable.
+TASKS = {
+    "karearea.scan": "manu.karearea.karearea:Karearea.scan",
+    "ruru.summarise": "manu.ruru.ruru:Ruru.summarise",
+    "kotare.embed": "manu.jobs:embed_texts"
+}
+
+STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED = ("succeeded", "failed", "cancelled")
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Kōtare embeddings as plain lists. The embedding cache is left to the API
+    process, which owns its files; workers only call the backend.
+    """
+    from manu.kotare.kotare import Kotare
+    from manu.kotare.embedder import VECTOR_DIM, EmbeddingEngine
+
+    dim = int(os.getenv("KOTARE_VECTOR_DIM") or VECTOR_DIM)
+    backend = Kotare._load_backend(os.getenv("KOTARE_EMBEDDER") or "hashing", dim)
+    return EmbeddingEngine(backend).embed(list(texts)).tolist()
+
+_instances: Dict[str, Any] = {}
+
+def resolve_task(kind: str) -> Callable:
+    """The callable behind a job kind, importing its kaitiaki on first use in this process"""
+    if kind not in TASKS:
+        raise ValueError(f"Unknown job kind '{kind}'. Options: {list(TASKS)}")
+    module_name, _, attribute = TASKS[kind].partition(":")
+    module = importlib.import_module(module_name)
+    if "." not in attribute:
+        return getattr(module, attribute)
+    class_name, method = attribute.split(".", 1)
+    key = f"{module_name}:{class_name}"
+    if key not in _instances:
+        _instances[key] = getattr(module, class_name)()
+    return getattr(_instances[key], method)
+
+class JobStore:
+    """
+    SQLite (WAL) job table shared by the API process and every worker.
+    Claiming runs in an IMMEDIATE transaction, so two workers never take the
+    same job.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit; transactions are opened explicitly where they matter
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+            "priority INTEGER NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL, "
+            "max_attempts INTEGER NOT NULL, run_after REAL NOT NULL, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, worker_pid INTEGER, cancel_requested INTEGER NOT NULL, "
+            "result TEXT, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, created_at)")
+
+    def _row(self, row: Optional[tuple]) -> Optional[Dict]:
+        if row is None:
+            return None
+        columns = ("id", "kind", "payload", "priority", "status", "attempts", "max_attempts", "run_after",
+                   "created_at", "started_at", "finished_at", "worker_pid", "cancel_requested", "result", "error")
+        job = dict(zip(columns, row))
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def submit(self, kind: str, payload: Dict, priority: int = 0, max_attempts: int = 3) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs VALUES (?, ?, ?, ?, 'queued', 0, ?, ?, ?, NULL, NULL, NULL, 0, NULL, NULL)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), priority, max(max_attempts, 1), now, now)
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._row(self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        query, params = "SELECT * FROM jobs", []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [self._row(row) for row in self._db.execute(query, params).fetchall()]
+
+    def claim(self, worker_pid: int) -> Optional[Dict]:
+        """Take the highest-priority ready job (oldest first within a priority)"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ? "
+                    "ORDER BY priority DESC, created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, "
+                        "worker_pid = ? WHERE id = ?",
+                        (now, worker_pid, row[0])
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return self.get(row[0]) if row is not None else None
+
+    def complete(self, job_id: str, result: Any):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'succeeded', finished_at = ?, result = ?, error = NULL "
+                "WHERE id = ? AND status = 'running'",
+                (time.time(), json.dumps(result, ensure_ascii=False, default=str), job_id)
+            )
+
+    def fail(self, job_id: str, error: str, backoff: float = 2.0, max_backoff: float = 300.0) -> str:
+        """Record a failed attempt: back to the queue after a backoff, or failed for good"""
+        job = self.get(job_id)
+        if job is None or job["status"] != "running":
+            return job["status"] if job else "missing"
+        now = time.time()
+        if job["cancel_requested"]:
+            status, run_after = "cancelled", job["run_after"]
+        elif job["attempts"] < job["max_attempts"]:
+            # Exponential backoff with jitter so retried jobs don't land together
+            delay = min(backoff * 2 ** (job["attempts"] - 1), max_backoff) * random.uniform(0.5, 1.0)
+            status, run_after = "queued", now + delay
+        else:
+            status, run_after = "failed", job["run_after"]
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, run_after = ?, error = ?, worker_pid = NULL, finished_at = ? "
+                "WHERE id = ?",
+                (status, run_after, error, now if status in FINISHED else None, job_id)
+            )
+        return status
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job outright; a running one is flagged for its worker to be stopped"""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+            self._db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        job = self.get(job_id)
+        return job["status"] if job else None
+
+    def cancelled_running(self) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM jobs WHERE status = 'running' AND cancel_requested = 1"
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def mark_cancelled(self, job_id: str):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ?, worker_pid = NULL "
+                "WHERE id = ? AND status = 'running'",
+                (time.time(), job_id)
+            )
+
+    def running_on(self, worker_pid: int) -> List[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status = 'running' AND worker_pid = ?", (worker_pid,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def orphaned(self) -> List[str]:
+        """
+        Running jobs whose worker process no longer exists (e.g. after a
+        restart). A process holding the PID that was started after the job
+        was claimed is someone else reusing it, so that job is orphaned too.
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT id, worker_pid, started_at FROM jobs WHERE status = 'running'").fetchall()
+        orphans = []
+        for job_id, pid, started_at in rows:
+            try:
+                if psutil.Process(pid).create_time() > started_at:
+                    orphans.append(job_id)
+            except (psutil.Error, TypeError, ValueError):
+                orphans.append(job_id)
+        return orphans
+
+    def prune(self, older_than: float) -> int:
+        """Forget finished jobs that ended more than older_than seconds ago"""
+        with self._lock:
+            cursor = self._db.execute(
+                f"DELETE FROM jobs WHERE status IN {FINISHED} AND finished_at < ?", (time.time() - older_than,)
+            )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: 0 for status in STATUSES} | dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+def _worker_main(store_path: str, poll_interval: float, backoff: float):
+    """Worker process loop: claim, run, record, repeat"""
+    store = JobStore(store_path)
+    pid = os.getpid()
+    while True:
+        job = store.claim(pid)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        try:
+            result = resolve_task(job["kind"])(**job["payload"])
+        except Exception as e:
+            status = store.fail(job["id"], f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}", backoff)
+            print(f"⚠️ Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed -> {status}: {e}")
+            continue
+        store.complete(job["id"], result)
+
+class JobQueue:
+    """
+    Submits jobs to the store and supervises the worker processes: a worker
+    that dies has its job retried and is replaced, and a worker running a
+    cancelled job is stopped and replaced. A worker that dies within
+    min_uptime seconds of starting is restarted after a doubling delay, and
+    after max_restarts such deaths in a row the pool halts (jobs stay queued)
+    until start() is called again.
+    """
+
+    def __init__(self, path: Optional[str] = None, workers: Optional[int] = None, poll_interval: float = 0.5,
+                 backoff: Optional[float] = None, retention: Optional[float] = None,
+                 restart_backoff: float = 1.0, max_restart_backoff: float = 60.0, min_uptime: float = 10.0,
+                 max_restarts: Optional[int] = None):
+        self.store = JobStore(path or os.getenv("JOBS_DB_PATH") or str(Path(__file__).parent / "jobs.sqlite3"))
+        self.workers = max(workers or int(os.getenv("JOBS_WORKERS") or 2), 1)
+        self.poll_interval = poll_interval
+        self.backoff = backoff or float(os.getenv("JOBS_RETRY_BACKOFF") or 2.0)
+        self.retention = retention or float(os.getenv("JOBS_RETENTION") or 7 * 24 * 3600)
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+        self.min_uptime = min_uptime
+        self.max_restarts = max(max_restarts or int(os.getenv("JOBS_MAX_RESTARTS") or 5), 1)
+        self.halted: Optional[str] = None
+        # Spawned, not forked: the API process holds threads and open SQLite handles
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: List[Optional[multiprocessing.Process]] = []  # None while waiting to restart
+        self._spawned_at: List[float] = []
+        self._restart_at: List[float] = []
+        self._failures: List[int] = []  # Early deaths in a row, per slot
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+        self.stats = {"submitted": 0, "restarts": 0, "recovered": 0, "cancelled_running": 0}
+
+    def _spawn(self) -> multiprocessing.Process:
+        # Not a daemon: tasks such as Kārearea scans start processes of their own
+        process = self._context.Process(
+            target=_worker_main, args=(self.store.path, self.poll_interval, self.backoff),
+            name="ngahere-job-worker"
+        )
+        process.start()
+        return process
+
+    def start(self):
+        """
+        Start the workers and supervisor (idempotent, and clears a halt); jobs
+        left running by a previous run are retried
+        """
+        with self._lock:
+            if self._supervisor is not None:
+                return
+            self.halted = None
+            for job_id in self.store.orphaned():
+                self.store.fail(job_id, "Worker lost (restart)", self.backoff)
+                self.stats["recovered"] += 1
+            self._processes = [self._spawn() for _ in range(self.workers)]
+            self._spawned_at = [time.monotonic()] * self.workers
+            self._restart_at = [0.0] * self.workers
+            self._failures = [0] * self.workers
+            self._stop.clear()
+            self._supervisor = threading.Thread(target=self._supervise, name="ngahere-job-supervisor", daemon=True)
+            self._supervisor.start()
+
+    def _retire(self, slot: int, reason: str):
+        """Stop (if needed) a worker; whatever it was still running goes back for a retry"""
+        process = self._processes[slot]
+        if process.is_alive():
+            process.terminate()
+        process.join(timeout=5)
+        for job_id in self.store.running_on(process.pid):
+            self.store.fail(job_id, reason, self.backoff)
+            self.stats["recovered"] += 1
+        self._processes[slot] = None
+
+    def _respawn(self, slot: int):
+        self._processes[slot] = self._spawn()
+        self._spawned_at[slot] = time.monotonic()
+        self.stats["restarts"] += 1
+
+    def _replace(self, slot: int, reason: str):
+        self._retire(slot, reason)
+        self._respawn(slot)
+
+    def _crashed(self, slot: int) -> bool:
+        """Retire a dead worker and schedule its restart; False once the pool should halt"""
+        process = self._processes[slot]
+        reason = f"Worker exited with code {process.exitcode}"
+        self._retire(slot, reason)
+        now = time.monotonic()
+        if now - self._spawned_at[slot] >= self.min_uptime:
+            self._failures[slot] = 0
+        self._failures[slot] += 1
+        if self._failures[slot] >= self.max_restarts:
+            self.halted = f"{reason} within {self.min_uptime:g}s of starting, {self._failures[slot]} times in a row"
+            return False
+        delay = min(self.restart_backoff * 2 ** (self._failures[slot] - 1), self.max_restart_backoff)
+        self._restart_at[slot] = now + delay
+        return True
+
+    def _halt(self):
+        """Stop every worker after repeated early deaths (lock held); queued jobs wait for start()"""
+        print(f"⚠️ Job workers halted: {self.halted}")
+        for slot, process in enumerate(self._processes):
+            if process is not None:
+                self._retire(slot, "Worker pool halted")
+        self._processes = []
+        self._supervisor = None
+
+    def _supervise(self):
+        last_prune = 0.0
+        while not self._stop.wait(self.poll_interval):
+            with self._lock:
+                slots = {process.pid: slot for slot, process in enumerate(self._processes) if process is not None}
+                for job in self.store.cancelled_running():
+                    slot = slots.get(job["worker_pid"])
+                    if slot is None:
+                        continue
+                    self.store.mark_cancelled(job["id"])
+                    self._replace(slot, "Worker stopped to cancel another job")
+                    self.stats["cancelled_running"] += 1
+                for slot, process in enumerate(self._processes):
+                    if process is None:
+                        if time.monotonic() >= self._restart_at[slot]:
+                            self._respawn(slot)
+                    elif not process.is_alive() and not self._crashed(slot):
+                        self._halt()
+                        return
+            if time.time() - last_prune > 3600:
+                self.store.prune(self.retention)
+                last_prune = time.time()
+
+    def submit(self, kind: str, payload: Optional[Dict] = None, priority: int = 0,
+               max_attempts: int = 3) -> Dict:
+        """Queue a job and return it straight away; workers start on first use"""
+        if kind not in TASKS:
+            raise ValueError(f"Unknown job kind '{kind}'. Options: {list(TASKS)}")
+        job_id = self.store.submit(kind, payload or {}, priority, max_attempts)
+        self.stats["submitted"] += 1
+        if self.halted is None:
+            self.start()
+        return self.store.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        return self.store.cancel(job_id)
+
+    def shutdown(self):
+        self._stop.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+        with self._lock:
+            processes = [process for process in self._processes if process is not None]
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join(timeout=5)
+            self._processes = []
+            self._supervisor = None
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            alive = sum(1 for process in self._processes if process is not None and process.is_alive())
+        return {
+            "kinds": list(TASKS),
+            "jobs": self.store.counts(),
+            "workers": {"configured": self.workers, "alive": alive, "halted": self.halted},
+            **self.stats
+        }
@@ -1,7 +1,57 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterator
+
+from manu.karearea.ocr import OCREngine
+from manu.karearea.ocr_cache import OCRCache
+from manu.karearea.preprocess import Preprocessor
+
 class Karearea:
     def __init__(self):
         self.name = "Karearea"
+        workers = os.getenv("KAREAREA_WORKERS", "")
+        cache = None
+        if (os.getenv("KAREAREA_CACHE_ENABLED") or "true").lower() != "false":
+            cache = OCRCache(
+                os.getenv("KAREAREA_CACHE_PATH") or str(Path(__file__).parent / "ocr_cache.sqlite3")
+            )
+        dpi = int(os.getenv("KAREAREA_DPI") or 300)
+        preprocessor = None
+        if (os.getenv("KAREAREA_PREPROCESS") or "true").lower() != "false":
+            preprocessor = Preprocessor(
+                target_dpi=dpi,
+                deskew=(os.getenv("KAREAREA_DESKEW") or "true").lower() != "false",
+                binarize=(os.getenv("KAREAREA_BINARIZE") or "true").lower() != "false"
+            )
+        max_in_flight = os.getenv("KAREAREA_MAX_IN_FLIGHT", "")
+        self.engine = OCREngine(
+            workers=int(workers) if workers else None,
+            lang=os.getenv("KAREAREA_OCR_LANG") or "eng",
+            dpi=dpi,
+            cache=cache,
+            preprocessor=preprocessor,
+            max_in_flight=int(max_in_flight) if max_in_flight else None
+        )
+
+    def scan_pages(self, path: str) -> Iterator[Dict]:
+        """Karearea scans every page of a PDF, image or image directory, yielding each as it is read"""
+        return self.engine.scan(path)
+
+    def scan(self, path: str) -> Dict:
+        """Karearea scans a whole document with sharp eyesight: raw and clean text, page by page"""
+        pages = sorted(self.scan_pages(path), key=lambda page: (page["document"], page["page"]))
+        return {
+            "pages": pages,
+            "page_count": len(pages),
+            "failed": sum(1 for page in pages if "error" in page),
+            "cached": sum(1 for page in pages if page.get("cached")),
+            "clean_text": "\n\n".join(page["clean_text"] for page in pages if page.get("clean_text"))
+        }
 
-    def scan(self, image_path: str) -> str:
-        """Karearea scans images with sharp eyesight"""
-        return f"Karearea scanned: {image_path}"
\ No newline at end of file
+    def get_status(self) -> Dict:
+        return {
+            "kaitiaki": self.name,
+            "status": "ready",
+            "capabilities": ["ocr", "image_scanning", "text_extraction"],
+            "ocr": self.engine.get_stats()
+        }
@@ -0,0 +1,261 @@
+"""
+Kārearea OCR - Parallel page-by-page text extraction
+Documents (PDFs, multi-page TIFFs, single images or directories of images) are
+split into page references. Each worker process decodes and OCRs its own page,
+so every core is busy and results stream back as soon as each page finishes.
+Pages are discovered lazily and at most max_in_flight are decoded at once, so
+memory stays flat however long the document. With a cache, pages whose pixels
+were OCR'd before are not OCR'd again.
+"""
+
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from manu.karearea.ocr_cache import OCRCache, fingerprint_image, lookup_text
+from manu.karearea.preprocess import Preprocessor
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".gif", ".webp"}
+
+class PageRef:
+    """One page of a document: cheap to pickle, decoded only inside a worker"""
+
+    def __init__(self, document: str, path: str, page: int, kind: str, pages: int, error: Optional[str] = None):
+        self.document = document
+        self.path = path
+        self.page = page  # 1-based within the document
+        self.kind = kind  # "image", "frames" (multi-page TIFF/GIF) or "pdf"
+        self.pages = pages
+        self.error = error  # Set when the file could not even be opened to count its pages
+
+def _pdf_page_count(path: Path) -> int:
+    try:
+        from pdf2image import pdfinfo_from_path
+    except ImportError:
+        raise Exception("PDF scanning needs pdf2image (and poppler) installed")
+    return int(pdfinfo_from_path(str(path))["Pages"])
+
+def _frame_count(path: Path) -> int:
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return getattr(image, "n_frames", 1)
+
+def iter_pages(source: str) -> Iterator[PageRef]:
+    """
+    Page references for a PDF, an image (multi-frame aware) or a directory of
+    either, lazily. A file whose pages cannot be counted (corrupt, unreadable)
+    gives a single reference carrying the error, so the rest still get scanned.
+    """
+    root = Path(source)
+    if not root.exists():
+        raise FileNotFoundError(f"Nothing to scan at {source}")
+    files = sorted(p for p in root.rglob("*") if p.is_file()) if root.is_dir() else [root]
+
+    for path in files:
+        suffix = path.suffix.lower()
+        if suffix != ".pdf" and suffix not in IMAGE_SUFFIXES:
+            continue
+        document = str(path.relative_to(root)) if root.is_dir() else path.name
+        try:
+            if suffix == ".pdf":
+                count, kind = _pdf_page_count(path), "pdf"
+            else:
+                count = _frame_count(path)
+                kind = "frames" if count > 1 else "image"
+        except Exception as e:
+            yield PageRef(document, str(path), 1, "pdf" if suffix == ".pdf" else "image", 0, error=str(e))
+            continue
+        for page in range(1, count + 1):
+            yield PageRef(document, str(path), page, kind, count)
+
+def load_page(ref: PageRef, dpi: int = 300, grayscale: bool = False):
+    """
+    Decode a single page into a Pillow image and its resolution (None if
+    unknown). PDFs render at dpi; JPEGs decode straight to a reduced size when
+    they were scanned at two or more times dpi.
+    """
+    from PIL import Image
+
+    if ref.kind == "pdf":
+        from pdf2image import convert_from_path
+
+        pages = convert_from_path(ref.path, dpi=dpi, first_page=ref.page, last_page=ref.page, grayscale=grayscale)
+        return pages[0], dpi
+    image = Image.open(ref.path)
+    if ref.kind == "frames":
+        image.seek(ref.page - 1)
+    source_dpi = (image.info.get("dpi") or (None,))[0]
+    if source_dpi and source_dpi >= 2 * dpi and image.format == "JPEG":
+        width = image.size[0]
+        factor = int(source_dpi // dpi)
+        image.draft("L" if grayscale else image.mode, (image.size[0] // factor, image.size[1] // factor))
+        source_dpi = source_dpi * image.size[0] / width
+    image.load()
+    return image, source_dpi
+
+_CONTROL = re.compile(r"[^\S\n]+|[\x00-\x08\x0b-\x1f\x7f]")
+
+def clean_text(raw: str) -> str:
+    """Tidy OCR output: normalise unicode (keeping macrons), re-join hyphenated and wrapped lines"""
+    text = unicodedata.normalize("NFKC", raw)
+    text = _CONTROL.sub(lambda m: " " if m.group().isspace() else "", text)
+    text = re.sub(r"(\w)-[ ]*\n[ ]*(\w)", r"\1\2", text)
+    paragraphs = []
+    for block in re.split(r"\n[ ]*\n+", text):
+        line = " ".join(part.strip() for part in block.splitlines() if part.strip())
+        if line:
+            paragraphs.append(re.sub(r" {2,}", " ", line))
+    return "\n\n".join(paragraphs)
+
+def ocr_page(ref: PageRef, lang: str = "eng", dpi: int = 300, config: str = "",
+             cache_path: Optional[str] = None, settings: str = "",
+             preprocessor: Optional[Preprocessor] = None) -> Dict:
+    """Worker: decode one page, then reuse cached text for its fingerprint or clean it up and OCR it"""
+    import pytesseract
+
+    started = time.perf_counter()
+    result = {"document": ref.document, "page": ref.page, "pages": ref.pages}
+    try:
+        image, source_dpi = load_page(ref, dpi, grayscale=preprocessor is not None)
+        result["fingerprint"] = fingerprint_image(image)
+        cached = None
+        if cache_path:
+            cached = lookup_text(cache_path, OCRCache.make_key(result["fingerprint"], settings))
+        if cached is not None:
+            result.update(raw_text=cached[0], clean_text=cached[1], ocr_seconds=cached[2], cached=True)
+        else:
+            if preprocessor is not None:
+                image, result["preprocess"] = preprocessor(image, source_dpi)
+            raw = pytesseract.image_to_string(image, lang=lang, config=config)
+            result.update(raw_text=raw, clean_text=clean_text(raw))
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+def available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+class OCREngine:
+    """
+    Process pool OCR. scan() yields one result per page in completion order
+    (each carries document and page numbers); a failed page yields an
+    "error" entry instead of ending the scan. Cached pages are marked
+    "cached"; those from unchanged files come back without a worker.
+    No more than max_in_flight pages (default twice the workers) are queued
+    or being decoded at any moment.
+    """
+
+    def __init__(self, workers: Optional[int] = None, lang: str = "eng", dpi: int = 300, config: str = "",
+                 cache: Optional[OCRCache] = None, preprocessor: Optional[Preprocessor] = None,
+                 max_in_flight: Optional[int] = None):
+        self.workers = workers or available_cores()
+        self.lang = lang
+        self.dpi = dpi
+        self.config = config
+        self.cache = cache
+        self.preprocessor = preprocessor
+        self.max_in_flight = max(max_in_flight or 2 * self.workers, 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.stats = {"scans": 0, "pages": 0, "failed": 0, "ocr_seconds": 0.0}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def scan(self, source: str) -> Iterator[Dict]:
+        """Stream the source's pages (a missing path fails here, before streaming starts)"""
+        if not Path(source).exists():
+            raise FileNotFoundError(f"Nothing to scan at {source}")
+        self.stats["scans"] += 1
+        return self._stream(iter_pages(source))
+
+    @property
+    def settings(self) -> str:
+        """Everything besides the pixels that changes OCR output"""
+        preprocess = self.preprocessor.settings if self.preprocessor is not None else "none"
+        return f"lang={self.lang};config={self.config};preprocess={preprocess}"
+
+    def _cached_page(self, ref: PageRef) -> Optional[Dict]:
+        """Cached result for a page whose file has not changed since it was fingerprinted"""
+        fingerprint = self.cache.known_fingerprint(ref.path, ref.page, self.dpi)
+        if fingerprint is None:
+            return None
+        cached = self.cache.get(OCRCache.make_key(fingerprint, self.settings))
+        if cached is None:
+            return None
+        return {
+            "document": ref.document, "page": ref.page, "pages": ref.pages,
+            "fingerprint": fingerprint, "raw_text": cached["raw_text"], "clean_text": cached["clean_text"],
+            "ocr_seconds": cached["seconds"], "cached": True, "seconds": 0.0
+        }
+
+    def _stream(self, refs: Iterator[PageRef]) -> Iterator[Dict]:
+        cache_path = self.cache.path if self.cache is not None else None
+        pending: Dict[Future, PageRef] = {}
+
+        def finished(block: bool) -> Iterator[Dict]:
+            done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield self._record(future.result(), pending.pop(future))
+
+        try:
+            for ref in refs:
+                if ref.error is not None:
+                    yield self._record({"document": ref.document, "page": ref.page, "pages": ref.pages,
+                                        "error": ref.error, "seconds": 0.0}, ref)
+                    continue
+                result = self._cached_page(ref) if self.cache is not None else None
+                if result is not None:
+                    yield self._record(result, ref, fast=True)
+                    continue
+                # Backpressure: wait for a slot before decoding another page
+                while len(pending) >= self.max_in_flight:
+                    yield from finished(block=True)
+                future = self.executor.submit(
+                    ocr_page, ref, self.lang, self.dpi, self.config, cache_path, self.settings, self.preprocessor
+                )
+                pending[future] = ref
+                yield from finished(block=False)
+            while pending:
+                yield from finished(block=True)
+        finally:
+            # The consumer stopped early (e.g. the client disconnected)
+            for future in pending:
+                future.cancel()
+
+    def _record(self, result: Dict, ref: PageRef, fast: bool = False) -> Dict:
+        self.stats["pages"] += 1
+        self.stats["ocr_seconds"] += result["seconds"]
+        if "error" in result:
+            self.stats["failed"] += 1
+        if self.cache is not None:
+            key = OCRCache.make_key(result["fingerprint"], self.settings) if "fingerprint" in result else None
+            self.cache.record(result, ref.path, self.dpi, key, fast)
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "lang": self.lang,
+            "dpi": self.dpi,
+            "max_in_flight": self.max_in_flight,
+            "preprocess": self.preprocessor.settings if self.preprocessor is not None else None,
+            **self.stats,
+            "ocr_seconds": round(self.stats["ocr_seconds"], 3),
+            "cache": self.cache.get_stats() if self.cache is not None else None
+        }
@@ -0,0 +1,122 @@
+"""
+Kārearea OCR Cache - Page fingerprints → OCR text
+Each decoded page is fingerprinted by a hash of its pixels, so a re-submitted
+document only re-OCRs pages that are new or changed. A second table remembers
+the fingerprint of every (file, page) at a given size and mtime, letting
+unchanged files skip decoding altogether.
+"""
+
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+def fingerprint_image(image) -> str:
+    """Content hash of a page's pixels (independent of file format and metadata)"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode("ascii"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+_readers: Dict[str, sqlite3.Connection] = {}
+
+def lookup_text(path: str, key: str) -> Optional[Tuple[str, str, float]]:
+    """Read-only lookup used inside OCR worker processes (one connection per process)"""
+    db = _readers.get(path)
+    if db is None:
+        db = _readers[path] = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=10)
+    return db.execute("SELECT raw_text, clean_text, seconds FROM pages WHERE key = ?", (key,)).fetchone()
+
+class OCRCache:
+    """
+    SQLite store of OCR text keyed by page fingerprint plus OCR settings.
+    Workers read it directly; only the parent process writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, raw_text TEXT NOT NULL, clean_text TEXT NOT NULL, "
+            "seconds REAL NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            "path TEXT NOT NULL, page INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, dpi INTEGER NOT NULL, fingerprint TEXT NOT NULL, "
+            "PRIMARY KEY (path, page))"
+        )
+        self._db.commit()
+        self.stats = {"hits": 0, "unchanged_files": 0, "misses": 0, "stores": 0, "seconds_saved": 0.0}
+
+    @staticmethod
+    def make_key(fingerprint: str, settings: str) -> str:
+        return f"{fingerprint}:{hashlib.blake2b(settings.encode('utf-8'), digest_size=8).hexdigest()}"
+
+    def known_fingerprint(self, path: str, page: int, dpi: int) -> Optional[str]:
+        """Fingerprint recorded for this page if its file is unchanged since"""
+        stat = Path(path).stat()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint FROM sources WHERE path = ? AND page = ? AND size = ? "
+                "AND mtime_ns = ? AND dpi = ?",
+                (path, page, stat.st_size, stat.st_mtime_ns, dpi)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT raw_text, clean_text, seconds FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"raw_text": row[0], "clean_text": row[1], "seconds": row[2]}
+
+    def record(self, result: Dict, path: str, dpi: int, key: Optional[str], fast: bool = False):
+        """Count a page outcome and store anything freshly OCR'd"""
+        with self._lock:
+            if result.get("cached"):
+                self.stats["hits"] += 1
+                self.stats["unchanged_files"] += 1 if fast else 0
+                self.stats["seconds_saved"] += result.get("ocr_seconds", 0.0)
+            elif "error" not in result:
+                self.stats["misses"] += 1
+                self.stats["stores"] += 1
+                self._db.execute(
+                    "INSERT OR REPLACE INTO pages (key, raw_text, clean_text, seconds, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, result["raw_text"], result["clean_text"], result["seconds"], time.time())
+                )
+            if "fingerprint" in result and not fast:
+                stat = Path(path).stat()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sources (path, page, size, mtime_ns, dpi, fingerprint) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, result["page"], stat.st_size, stat.st_mtime_ns, dpi, result["fingerprint"])
+                )
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.execute("DELETE FROM sources")
+            self._db.commit()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "seconds_saved": round(self.stats["seconds_saved"], 3),
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": entries,
+                "path": self.path
+            }
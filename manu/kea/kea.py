@@ -1,10 +1,18 @@
+import os
 import yaml
 from pathlib import Path
+from typing import Dict, List, Optional
+
+from manu.kea.search import FederatedSearch, SearchSource, fixture_sources
 
 class Kea:
     def __init__(self):
         self.name = "Kea"
         self.prompts = self.load_prompts()
+        self.search_engine = FederatedSearch(
+            fixture_sources(),
+            timeout=float(os.getenv("KEA_SOURCE_TIMEOUT") or 5.0)
+        )
 
     def load_prompts(self):
         prompt_dir = Path(__file__).parent / "prompts"
@@ -24,3 +32,11 @@ class Kea:
             "tested": True,
             "notes": "No obvious errors found (Kea test run)."
         }
+
+    def add_source(self, source: SearchSource):
+        """Let Kea fly to another archive (replaces a source with the same name)"""
+        self.search_engine.register(source)
+
+    async def search(self, query: str, limit: int = 20, sources: Optional[List[str]] = None) -> Dict:
+        """Kea searches every source at once and returns merged, de-duplicated results"""
+        return await self.search_engine.search(query, limit, sources)
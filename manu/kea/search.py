@@ -0,0 +1,177 @@
+"""
+Kea Search - Federated search across archives and databases
+Every source is queried at once, each under its own timeout, so a search
+takes as long as the slowest source (or its timeout), never the sum. Results
+are merged, duplicates folded together and ranked by reciprocal rank fusion.
+"""
+
+import re
+import json
+import time
+import asyncio
+import unicodedata
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+def fold(text: str) -> str:
+    """Lowercase and strip macrons/diacritics so 'Māori' matches 'maori'"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+class SearchSource(ABC):
+    """
+    One archive or database. search() returns result dicts with at least a
+    title; snippet, url and date are optional. Results come back in the
+    source's own relevance order.
+    """
+
+    name = "source"
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+
+    @abstractmethod
+    async def search(self, query: str, limit: int = 20) -> List[Dict]:
+        pass
+
+class FixtureSource(SearchSource):
+    """
+    Offline source backed by a JSON fixture ({"source", "latency", "records"}).
+    Records are ranked by how many query words they contain, and the fixture's
+    latency is simulated so fan-out behaves as it would against the network.
+    """
+
+    def __init__(self, path: Path, name: Optional[str] = None, timeout: Optional[float] = None,
+                 latency: Optional[float] = None):
+        super().__init__(timeout)
+        with open(path, "r", encoding="utf-8") as f:
+            fixture = json.load(f)
+        self.name = name or fixture.get("source") or path.stem
+        self.latency = fixture.get("latency", 0.0) if latency is None else latency
+        self.records = fixture.get("records", [])
+        self._index = [set(_WORD.findall(fold(f"{r.get('title', '')} {r.get('snippet', '')}"))) for r in self.records]
+
+    async def search(self, query: str, limit: int = 20) -> List[Dict]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        terms = set(_WORD.findall(fold(query)))
+        scored = []
+        for position, (record, words) in enumerate(zip(self.records, self._index)):
+            matched = len(terms & words)
+            if matched:
+                scored.append((-matched, position, record))
+        scored.sort(key=lambda item: item[:2])
+        return [
+            {
+                "title": record["title"],
+                "snippet": record.get("snippet", ""),
+                "url": record.get("url") or f"fixture://{self.name}/{record.get('id', position)}",
+                "date": record.get("date", "")
+            }
+            for _, position, record in scored[:limit]
+        ]
+
+def fixture_sources(timeout: Optional[float] = None) -> List[SearchSource]:
+    """Every fixture in manu/kea/fixtures as a source (LINZ, Māori Land Court, Papers Past)"""
+    return [FixtureSource(path, timeout=timeout) for path in sorted(FIXTURES_DIR.glob("*.json"))]
+
+class FederatedSearch:
+    """
+    Concurrent fan-out over sources. A source that times out or raises is
+    reported in the per-source status and contributes nothing; it never
+    fails the search.
+    """
+
+    rrf_k = 60  # Reciprocal rank fusion damping; the usual default
+
+    def __init__(self, sources: List[SearchSource], timeout: float = 5.0):
+        self.sources: Dict[str, SearchSource] = {source.name: source for source in sources}
+        self.timeout = timeout
+        self.stats = {"searches": 0, "timeouts": 0, "errors": 0}
+
+    def register(self, source: SearchSource):
+        self.sources[source.name] = source
+
+    async def _query(self, source: SearchSource, query: str, limit: int) -> Dict:
+        started = time.perf_counter()
+        status = {"status": "ok", "count": 0}
+        results = []
+        try:
+            results = await asyncio.wait_for(source.search(query, limit), source.timeout or self.timeout)
+            status["count"] = len(results)
+        except asyncio.TimeoutError:
+            status["status"] = "timeout"
+            self.stats["timeouts"] += 1
+        except Exception as e:
+            status.update(status="error", error=str(e))
+            self.stats["errors"] += 1
+        status["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return {"name": source.name, "status": status, "results": results}
+
+    @staticmethod
+    def _keys(result: Dict) -> List[str]:
+        """Identities a result can be matched on: its URL, and its title plus date"""
+        keys = [f"title:{' '.join(_WORD.findall(fold(result['title'])))}|{result.get('date', '')}"]
+        if result.get("url"):
+            keys.append(f"url:{result['url'].rstrip('/')}")
+        return keys
+
+    def merge(self, responses: List[Dict], limit: int) -> List[Dict]:
+        """Fold duplicates across sources and rank by reciprocal rank fusion"""
+        merged: List[Dict] = []
+        by_key: Dict[str, Dict] = {}
+        for response in responses:
+            for rank, result in enumerate(response["results"]):
+                keys = self._keys(result)
+                entry = next((by_key[key] for key in keys if key in by_key), None)
+                if entry is None:
+                    entry = {
+                        "title": result["title"],
+                        "snippet": result.get("snippet", ""),
+                        "url": result.get("url", ""),
+                        "date": result.get("date", ""),
+                        "sources": [],
+                        "score": 0.0
+                    }
+                    merged.append(entry)
+                if response["name"] not in entry["sources"]:
+                    entry["sources"].append(response["name"])
+                    entry["score"] += 1.0 / (self.rrf_k + rank + 1)
+                if not entry["snippet"] and result.get("snippet"):
+                    entry["snippet"] = result["snippet"]
+                for key in keys:
+                    by_key.setdefault(key, entry)
+        merged.sort(key=lambda entry: -entry["score"])
+        for entry in merged:
+            entry["score"] = round(entry["score"], 6)
+        return merged[:limit]
+
+    async def search(self, query: str, limit: int = 20, sources: Optional[List[str]] = None) -> Dict:
+        """Query every (or the named) source concurrently and return the merged JSON shape"""
+        started = time.perf_counter()
+        names = sources or list(self.sources)
+        unknown = [name for name in names if name not in self.sources]
+        if unknown:
+            raise ValueError(f"Unknown Kea sources {unknown}. Options: {list(self.sources)}")
+        self.stats["searches"] += 1
+        responses = await asyncio.gather(*(self._query(self.sources[name], query, limit) for name in names))
+        return {
+            "query": query,
+            "results": self.merge(responses, limit),
+            "sources": {response["name"]: response["status"] for response in responses},
+            "took_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def get_status(self) -> Dict:
+        return {
+            "sources": {
+                name: {"type": type(source).__name__, "timeout": source.timeout or self.timeout}
+                for name, source in self.sources.items()
+            },
+            **self.stats
+        }
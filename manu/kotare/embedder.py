@@ -0,0 +1,172 @@
+"""
+Kōtare Embedder - Batched embedding engine
+Kōtare strikes in batches: texts are grouped into provider-sized batches and
+each batch is one backend call, returning float32 NumPy matrices.
+"""
+
+import re
+import hashlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, List, Type
+
+import numpy as np
+
+VECTOR_DIM = 3072  # Supabase vectors were migrated to 3072 dimensions
+
+class EmbeddingBackend(ABC):
+    """A model that turns a batch of texts into an (n, dim) float32 matrix"""
+
+    name = "backend"
+    max_batch_size = 64
+
+    def __init__(self, dim: int = VECTOR_DIM):
+        self.dim = dim
+
+    @abstractmethod
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        pass
+
+@lru_cache(maxsize=200_000)
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+class HashingEmbedder(EmbeddingBackend):
+    """
+    Deterministic, offline embedder using signed feature hashing of words and
+    word bigrams. Not semantic like a trained model, but stable across runs and
+    machines, so Kōtare works (and tests) without a network.
+    """
+
+    name = "hashing"
+    max_batch_size = 512
+
+    _token = re.compile(r"\w+", re.UNICODE)
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = self._token.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter((_feature_hash(f) for f in features), dtype=np.uint64, count=len(features))
+            indices = (hashes % np.uint64(self.dim)).astype(np.intp)
+            signs = np.where(hashes >> np.uint64(63), 1.0, -1.0).astype(np.float32)
+            np.add.at(vectors[row], indices, signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+class OpenAIEmbedder(EmbeddingBackend):
+    """OpenAI embeddings endpoint (text-embedding-3-large is 3072-dim)"""
+
+    name = "openai"
+    max_batch_size = 256
+
+    def __init__(self, dim: int = VECTOR_DIM, model: str = "text-embedding-3-large",
+                 api_key: str = None, endpoint: str = "https://api.openai.com"):
+        super().__init__(dim)
+        self.model = model
+        self.api_key = api_key
+        self.endpoint = endpoint
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        # Shares Cloud Kaitiaki's keep-alive session pool
+        from manu.cloud_kaitiaki import session_pool
+
+        try:
+            response = session_pool.post(
+                f"{self.endpoint}/v1/embeddings",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={"model": self.model, "input": texts, "dimensions": self.dim},
+                timeout=60
+            )
+            if response.status_code != 200:
+                raise Exception(f"OpenAI API error: {response.text}")
+            data = sorted(response.json()["data"], key=lambda item: item["index"])
+            return np.asarray([item["embedding"] for item in data], dtype=np.float32)
+        except Exception as e:
+            raise Exception(f"OpenAI embedding failed: {str(e)}")
+
+EMBEDDING_BACKENDS: Dict[str, Type[EmbeddingBackend]] = {
+    HashingEmbedder.name: HashingEmbedder,
+    OpenAIEmbedder.name: OpenAIEmbedder
+}
+
+def register_backend(backend: Type[EmbeddingBackend]):
+    """Make a backend selectable by name (KOTARE_EMBEDDER)"""
+    EMBEDDING_BACKENDS[backend.name] = backend
+    return backend
+
+class EmbeddingEngine:
+    """
+    Splits any number of texts into backend-sized batches, one call per batch.
+    With a cache, texts already embedded (or repeated within the call) skip
+    the backend entirely.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, batch_size: int = None, cache=None):
+        self.backend = backend
+        self.batch_size = min(batch_size or backend.max_batch_size, backend.max_batch_size)
+        self.cache = cache
+        self.stats = {"texts": 0, "embedded": 0, "batches": 0, "bytes_saved": 0}
+
+    @property
+    def dim(self) -> int:
+        return self.backend.dim
+
+    def _embed_batches(self, texts: List[str]) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            out[start:start + len(batch)] = self.backend.embed_batch(batch)
+            self.stats["batches"] += 1
+        self.stats["embedded"] += len(texts)
+        return out
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in order as an (n, dim) float32 matrix"""
+        self.stats["texts"] += len(texts)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if self.cache is None:
+            return self._embed_batches(texts)
+
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        keys = [self.cache.key(text) for text in texts]
+        hits, misses = self.cache.lookup(keys)
+        for position, vector in hits.items():
+            out[position] = vector
+
+        # Repeats within this call are embedded once
+        first_seen: Dict[bytes, int] = {}
+        for position in misses:
+            first_seen.setdefault(keys[position], position)
+        fresh = list(first_seen.values())
+        if fresh:
+            vectors = self._embed_batches([texts[position] for position in fresh])
+            out[fresh] = vectors
+            self.cache.store([keys[position] for position in fresh], vectors)
+        for position in misses:
+            out[position] = out[first_seen[keys[position]]]
+
+        embedded = set(fresh)
+        self.stats["bytes_saved"] += sum(
+            len(text.encode("utf-8")) for position, text in enumerate(texts) if position not in embedded
+        )
+        return out
+
+    def get_stats(self) -> Dict:
+        stats = {
+            "backend": self.backend.name,
+            "dim": self.dim,
+            "batch_size": self.batch_size,
+            **self.stats
+        }
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        return stats
@@ -0,0 +1,103 @@
+"""
+Kōtare Embedding Cache - Content-hash → vector store
+Unchanged texts are never embedded twice: vectors live in a memory-mapped
+float32 matrix and a parallel file of 16-byte content hashes gives the row.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from manu.kotare.vector_index import GrowableArray
+
+DIGEST_SIZE = 16
+
+class EmbeddingCache:
+    """
+    Append-only content-addressed cache for one embedder.
+    The hash covers the backend name and dim as well as the text, so switching
+    embedders never serves stale vectors. Without a path it lives in memory.
+    """
+
+    def __init__(self, dim: int, backend_name: str, path: Optional[str] = None):
+        self.dim = dim
+        self.backend_name = backend_name
+        self.path = Path(path) if path else None
+        self.rows: Dict[bytes, int] = {}
+        self._lock = threading.Lock()
+        self._keys = None
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0}
+
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            keys_path = self.path / "keys.bin"
+            if keys_path.exists():
+                raw = keys_path.read_bytes()
+                usable = len(raw) - len(raw) % DIGEST_SIZE
+                for row, start in enumerate(range(0, usable, DIGEST_SIZE)):
+                    self.rows[raw[start:start + DIGEST_SIZE]] = row
+            self._keys = open(keys_path, "ab")
+        self.vectors = GrowableArray(
+            np.float32, dim, self.path / "vectors.f32" if self.path else None,
+            capacity=max(len(self.rows), 1024)
+        )
+
+    def key(self, text: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        digest.update(f"{self.backend_name}:{self.dim}:".encode("utf-8"))
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+
+    def lookup(self, keys: List[bytes]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """Cached vectors by position, and the positions that missed"""
+        hits, misses = {}, []
+        with self._lock:
+            for position, key in enumerate(keys):
+                row = self.rows.get(key)
+                if row is None:
+                    misses.append(position)
+                else:
+                    hits[position] = np.array(self.vectors.data[row])
+            self.stats["lookups"] += len(keys)
+            self.stats["hits"] += len(hits)
+            self.stats["misses"] += len(misses)
+        return hits, misses
+
+    def store(self, keys: List[bytes], vectors: np.ndarray):
+        """Add new vectors (already-cached keys are skipped)"""
+        with self._lock:
+            fresh = [(key, vector) for key, vector in zip(keys, vectors) if key not in self.rows]
+            if not fresh:
+                return
+            start = len(self.rows)
+            self.vectors.ensure(start + len(fresh))
+            for offset, (_, vector) in enumerate(fresh):
+                self.vectors.data[start + offset] = vector
+            # Vectors reach disk before their keys, so a crash never leaves a key without a vector
+            self.vectors.flush()
+            for offset, (key, _) in enumerate(fresh):
+                self.rows[key] = start + offset
+            if self._keys is not None:
+                self._keys.write(b"".join(key for key, _ in fresh))
+                self._keys.flush()
+            self.stats["stores"] += len(fresh)
+
+    def close(self):
+        self.vectors.flush()
+        if self._keys is not None:
+            self._keys.close()
+            self._keys = None
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["lookups"]
+        entries = len(self.rows)
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "store_bytes": entries * (self.dim * 4 + DIGEST_SIZE),
+            "path": str(self.path) if self.path else None
+        }
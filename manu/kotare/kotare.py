@@ -1,7 +1,133 @@
+import os
+import json
+import uuid
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from manu.kotare.embedder import (
+    EMBEDDING_BACKENDS, VECTOR_DIM, EmbeddingBackend, EmbeddingEngine, OpenAIEmbedder
+)
+from manu.kotare.embedding_cache import EmbeddingCache
+from manu.kotare.vector_index import VectorIndex
+
+DEFAULT_COLLECTION = "default"
+
 class Kotare:
     def __init__(self):
         self.name = "Kotare"
+        dim = int(os.getenv("KOTARE_VECTOR_DIM") or VECTOR_DIM)
+        backend = self._load_backend(os.getenv("KOTARE_EMBEDDER") or "hashing", dim)
+        batch_size = os.getenv("KOTARE_BATCH_SIZE", "")
+        cache = None
+        if (os.getenv("KOTARE_CACHE_ENABLED") or "true").lower() != "false":
+            cache = EmbeddingCache(
+                dim, backend.name,
+                os.getenv("KOTARE_CACHE_PATH") or str(Path(__file__).parent / "embedding_cache")
+            )
+        self.engine = EmbeddingEngine(backend, int(batch_size) if batch_size else None, cache)
+        self.index_path = Path(os.getenv("KOTARE_INDEX_PATH") or Path(__file__).parent / "memory_index")
+        self.nprobe = int(os.getenv("KOTARE_INDEX_NPROBE") or 8)
+        self.quantization = os.getenv("KOTARE_QUANTIZATION") or "none"
+        pq_subvectors = os.getenv("KOTARE_PQ_SUBVECTORS", "")
+        self.pq_subvectors = int(pq_subvectors) if pq_subvectors else None
+        self.rerank = int(os.getenv("KOTARE_RERANK") or 4)
+        self.collections: Dict[str, VectorIndex] = {}
+        self._lock = threading.Lock()
+        # Collections already on disk open with the quantization they were created with
+        if self.index_path.exists():
+            for header in sorted(self.index_path.glob("*/header.json")):
+                self.collection(header.parent.name)
+
+    @property
+    def index(self) -> VectorIndex:
+        """The default collection"""
+        return self.collection(DEFAULT_COLLECTION)
+
+    def collection(self, name: str = DEFAULT_COLLECTION, quantization: Optional[str] = None,
+                   pq_subvectors: Optional[int] = None) -> VectorIndex:
+        """
+        Open (or create) a named memory collection with its own quantization
+        mode. Asking for a different mode than an existing collection was
+        created with is a ValueError, as the mode can't change once built.
+        """
+        index = self.collections.get(name)
+        if index is None:
+            if not name or not all(c.isalnum() or c in "-_" for c in name):
+                raise ValueError(f"Invalid collection name '{name}'")
+            with self._lock:
+                index = self.collections.get(name)
+                if index is None:
+                    path = self.index_path / name
+                    stored = self._stored_quantization(path)
+                    if quantization is not None and stored is not None and quantization != stored:
+                        raise ValueError(f"Collection '{name}' uses '{stored}' quantization, not '{quantization}'")
+                    index = self.collections[name] = VectorIndex(
+                        self.engine.dim,
+                        str(path),
+                        nprobe=self.nprobe,
+                        quantization=stored or quantization or self.quantization,
+                        pq_subvectors=pq_subvectors or self.pq_subvectors,
+                        rerank=self.rerank
+                    )
+                    return index
+        if quantization is not None and quantization != index.quantization:
+            raise ValueError(f"Collection '{name}' uses '{index.quantization}' quantization, not '{quantization}'")
+        return index
+
+    @staticmethod
+    def _stored_quantization(path: Path) -> Optional[str]:
+        """Quantization of a collection already on disk, None if there is none yet"""
+        header_path = path / "header.json"
+        if not header_path.exists():
+            return None
+        with open(header_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("quantization", "none")
+
+    @staticmethod
+    def _load_backend(name: str, dim: int) -> EmbeddingBackend:
+        """Pick the embedding backend named in Korito (offline hashing by default)"""
+        if name not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown Kotare embedder '{name}'. Options: {list(EMBEDDING_BACKENDS)}")
+        if name == OpenAIEmbedder.name:
+            return OpenAIEmbedder(dim=dim, api_key=os.getenv("OPENAI_API_KEY", ""))
+        return EMBEDDING_BACKENDS[name](dim=dim)
+
+    def embed(self, text: Union[str, List[str]]) -> np.ndarray:
+        """Kotare embeds text into vectors: one (dim,) vector per string, (n, dim) for a list"""
+        if isinstance(text, str):
+            return self.engine.embed([text])[0]
+        return self.engine.embed(list(text))
+
+    def remember(self, texts: List[str], ids: Optional[List[str]] = None,
+                 metadata: Optional[List[Dict]] = None, collection: str = DEFAULT_COLLECTION) -> List[str]:
+        """Kotare embeds texts and stores them in the memory index (text kept in metadata)"""
+        if ids is not None and len(ids) != len(texts):
+            raise ValueError(f"Got {len(ids)} ids for {len(texts)} texts")
+        if metadata is not None and len(metadata) != len(texts):
+            raise ValueError(f"Got {len(metadata)} metadata entries for {len(texts)} texts")
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        metadata = metadata or [{} for _ in texts]
+        metadata = [{**meta, "text": text} for meta, text in zip(metadata, texts)]
+        self.collection(collection).add(ids, self.embed(texts), metadata)
+        return ids
+
+    def search(self, query: str, k: int = 5, filters: Optional[Dict] = None,
+               collection: str = DEFAULT_COLLECTION) -> List[Dict]:
+        """Kotare dives for the k memories nearest to the query"""
+        return self.collection(collection).search(self.embed(query), k, filters)
+
+    def forget(self, ids: List[str], collection: str = DEFAULT_COLLECTION) -> int:
+        """Kotare drops memories from the index"""
+        return self.collection(collection).delete(ids)
 
-    def embed(self, text: str) -> str:
-        """Kotare embeds text into vectors"""
-        return f"Kotare embedded: {text[:50]}..."
\ No newline at end of file
+    def get_status(self) -> Dict:
+        return {
+            "kaitiaki": self.name,
+            "status": "ready",
+            "capabilities": ["embedding", "vector_search", "memory_storage"],
+            "embedder": self.engine.get_stats(),
+            "collections": {name: index.get_stats() for name, index in self.collections.items()}
+        }
@@ -0,0 +1,221 @@
+"""
+Kōtare Quantization - Compact codes for the vector index
+A 3072-dim float32 vector is 12 KB. Scalar quantization stores one int8 per
+dimension (4x smaller); product quantization stores one byte per sub-vector
+(16x smaller by default). Codes are scanned for candidates and the float
+vectors, left on disk, are only read to re-rank the best of them.
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Optional, Type
+
+import numpy as np
+
+class Quantizer(ABC):
+    """Encodes unit vectors into fixed-size byte codes with approximate inner products"""
+
+    mode = "quantizer"
+    min_training = 1
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    @property
+    @abstractmethod
+    def code_size(self) -> int:
+        """Bytes per vector"""
+        pass
+
+    @property
+    @abstractmethod
+    def trained(self) -> bool:
+        pass
+
+    @abstractmethod
+    def train(self, sample: np.ndarray):
+        pass
+
+    @abstractmethod
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, dim) float32 -> (n, code_size) uint8"""
+        pass
+
+    @abstractmethod
+    def scorer(self, query: np.ndarray) -> Callable[[np.ndarray], np.ndarray]:
+        """Function from (n, code_size) codes to approximate query scores"""
+        pass
+
+    @abstractmethod
+    def _state(self) -> Dict[str, np.ndarray]:
+        pass
+
+    @abstractmethod
+    def _restore(self, state: Dict[str, np.ndarray]):
+        pass
+
+    def save(self, path: Path):
+        if self.trained:
+            np.savez(path, **self._state())
+
+    def load(self, path: Path):
+        if path.exists():
+            with np.load(path) as state:
+                self._restore(dict(state))
+
+    def get_stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "trained": self.trained,
+            "bytes_per_vector": self.code_size,
+            "compression": round(self.dim * 4 / self.code_size, 1)
+        }
+
+class ScalarQuantizer(Quantizer):
+    """
+    One byte per dimension over the trained [min, max] range of each dimension.
+    q·v is recovered as q·min + step·q·code, so a scan is one int8 matmul.
+    """
+
+    mode = "int8"
+
+    def __init__(self, dim: int):
+        super().__init__(dim)
+        self.low: Optional[np.ndarray] = None
+        self.step: Optional[np.ndarray] = None
+
+    @property
+    def code_size(self) -> int:
+        return self.dim
+
+    @property
+    def trained(self) -> bool:
+        return self.low is not None
+
+    def train(self, sample: np.ndarray):
+        low = sample.min(axis=0)
+        high = sample.max(axis=0)
+        self.low = low.astype(np.float32)
+        self.step = np.maximum((high - low) / 255.0, 1e-12).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.low) / self.step)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def scorer(self, query: np.ndarray) -> Callable[[np.ndarray], np.ndarray]:
+        weights = (query * self.step).astype(np.float32)
+        offset = float(query @ self.low)
+        return lambda codes: codes.astype(np.float32) @ weights + offset
+
+    def _state(self) -> Dict[str, np.ndarray]:
+        return {"low": self.low, "step": self.step}
+
+    def _restore(self, state: Dict[str, np.ndarray]):
+        self.low = state["low"]
+        self.step = state["step"]
+
+def _kmeans_batched(data: np.ndarray, k: int, iterations: int, rng) -> np.ndarray:
+    """Euclidean k-means run independently for each sub-space: (m, n, d) -> (m, k, d)"""
+    m, n, _ = data.shape
+    centroids = data[:, rng.choice(n, k, replace=False)].copy()
+    for _ in range(iterations):
+        # ||x - c||^2 ordering only needs ||c||^2 - 2 x·c
+        scores = np.matmul(data, centroids.transpose(0, 2, 1))
+        scores *= -2
+        scores += (centroids ** 2).sum(axis=2)[:, None, :]
+        assign = np.argmin(scores, axis=2)
+        for sub in range(m):
+            counts = np.bincount(assign[sub], minlength=k)
+            sums = np.zeros_like(centroids[sub])
+            np.add.at(sums, assign[sub], data[sub])
+            filled = counts > 0
+            centroids[sub, filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+class ProductQuantizer(Quantizer):
+    """
+    Splits vectors into subvectors sub-spaces with 256 centroids each; a code
+    is one centroid byte per sub-space. Queries build a (subvectors, 256)
+    table of partial inner products and a scan is a table lookup and sum.
+    """
+
+    mode = "pq"
+    centroids_per_subspace = 256
+    min_training = centroids_per_subspace
+
+    def __init__(self, dim: int, subvectors: Optional[int] = None, iterations: int = 10):
+        super().__init__(dim)
+        subvectors = subvectors or max(1, dim // 4)
+        if dim % subvectors:
+            raise ValueError(f"PQ subvectors ({subvectors}) must divide the vector dim ({dim})")
+        self.subvectors = subvectors
+        self.iterations = iterations
+        self.codebooks: Optional[np.ndarray] = None
+
+    @property
+    def code_size(self) -> int:
+        return self.subvectors
+
+    @property
+    def trained(self) -> bool:
+        return self.codebooks is not None
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors.reshape(len(vectors), self.subvectors, -1).transpose(1, 0, 2)
+
+    def train(self, sample: np.ndarray):
+        if len(sample) < self.min_training:
+            raise ValueError(f"PQ needs at least {self.min_training} training vectors")
+        rng = np.random.default_rng(0)
+        sample = sample[rng.choice(len(sample), min(len(sample), 64 * self.centroids_per_subspace), replace=False)]
+        sub = self._split(np.ascontiguousarray(sample, dtype=np.float32))
+        # Chunked over sub-spaces so the distance tensor stays small
+        books = []
+        step = max(1, 2 ** 26 // (len(sample) * self.centroids_per_subspace))
+        for start in range(0, self.subvectors, step):
+            books.append(_kmeans_batched(sub[start:start + step], self.centroids_per_subspace, self.iterations, rng))
+        self.codebooks = np.concatenate(books).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        sub = self._split(np.asarray(vectors, dtype=np.float32))
+        codes = np.empty((len(vectors), self.subvectors), dtype=np.uint8)
+        norms = (self.codebooks ** 2).sum(axis=2)
+        step = max(1, 2 ** 24 // (max(len(vectors), 1) * self.centroids_per_subspace))
+        for start in range(0, self.subvectors, step):
+            scores = np.matmul(sub[start:start + step], self.codebooks[start:start + step].transpose(0, 2, 1))
+            scores *= -2
+            scores += norms[start:start + step, None, :]
+            codes[:, start:start + step] = np.argmin(scores, axis=2).T
+        return codes
+
+    def scorer(self, query: np.ndarray) -> Callable[[np.ndarray], np.ndarray]:
+        sub_query = query.reshape(self.subvectors, -1)
+        table = np.einsum("mkd,md->mk", self.codebooks, sub_query).astype(np.float32)
+        flat = table.reshape(-1)
+        offsets = (np.arange(self.subvectors) * self.centroids_per_subspace).astype(np.intp)
+        return lambda codes: flat[codes.astype(np.intp) + offsets].sum(axis=1)
+
+    def _state(self) -> Dict[str, np.ndarray]:
+        return {"codebooks": self.codebooks}
+
+    def _restore(self, state: Dict[str, np.ndarray]):
+        self.codebooks = state["codebooks"]
+        self.subvectors = len(self.codebooks)
+
+    def get_stats(self) -> Dict:
+        return {**super().get_stats(), "subvectors": self.subvectors}
+
+QUANTIZERS: Dict[str, Type[Quantizer]] = {
+    ScalarQuantizer.mode: ScalarQuantizer,
+    ProductQuantizer.mode: ProductQuantizer
+}
+
+def make_quantizer(mode: str, dim: int, pq_subvectors: Optional[int] = None) -> Optional[Quantizer]:
+    """Quantizer for a collection's mode ("none" keeps plain float vectors)"""
+    if not mode or mode == "none":
+        return None
+    if mode not in QUANTIZERS:
+        raise ValueError(f"Unknown quantization '{mode}'. Options: none, {', '.join(QUANTIZERS)}")
+    if mode == ProductQuantizer.mode:
+        return ProductQuantizer(dim, pq_subvectors)
+    return QUANTIZERS[mode](dim)
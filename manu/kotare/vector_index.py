@@ -0,0 +1,528 @@
+"""
+Kōtare Vector Index - In-process approximate nearest-neighbour search
+An IVF-flat index over NumPy: vectors are clustered into inverted lists and a
+query only scans the few lists nearest to it. Vectors and list assignments live
+in memory-mapped files with an append-only log of ids and metadata, so inserts
+are durable immediately and a million-vector index opens without loading it.
+With quantization on, searches scan compact codes and only re-rank the best
+candidates against the float vectors.
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from manu.kotare.quantization import make_quantizer
+
+class GrowableArray:
+    """Row-growable array kept in memory or in a memory-mapped file"""
+
+    def __init__(self, dtype, cols: Optional[int] = None, path: Optional[Path] = None,
+                 capacity: int = 1024):
+        self.dtype = np.dtype(dtype)
+        self.cols = cols
+        self.path = path
+        self.capacity = 0
+        self.data = None
+        if path is not None and path.exists():
+            row_bytes = self.dtype.itemsize * (cols or 1)
+            capacity = max(path.stat().st_size // row_bytes, capacity)
+        self._resize(capacity)
+
+    def _shape(self, rows: int):
+        return (rows, self.cols) if self.cols else (rows,)
+
+    def _resize(self, capacity: int):
+        if self.path is None:
+            data = np.zeros(self._shape(capacity), dtype=self.dtype)
+            if self.data is not None:
+                data[:self.capacity] = self.data[:self.capacity]
+            self.data = data
+        else:
+            if self.data is not None:
+                self.data.flush()
+                self.data = None
+            size = capacity * self.dtype.itemsize * (self.cols or 1)
+            with open(self.path, "ab") as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            self.data = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=self._shape(capacity))
+        self.capacity = capacity
+
+    def ensure(self, rows: int):
+        """Make room for at least rows rows (capacity doubles)"""
+        if rows > self.capacity:
+            capacity = self.capacity or 1
+            while capacity < rows:
+                capacity *= 2
+            self._resize(capacity)
+
+    def flush(self):
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+
+def spherical_kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Cluster unit vectors into k unit centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        if empty.any():
+            sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+            norms[empty] = np.linalg.norm(sums[empty], axis=1)
+        centroids = (sums / norms[:, None]).astype(np.float32)
+    return centroids
+
+class VectorIndex:
+    """
+    IVF-flat cosine index with string ids and metadata.
+
+    Until train_threshold vectors exist the index is an exact flat scan. It
+    then trains about sqrt(n) centroids and every later insert joins its
+    nearest list; it retrains automatically each time it grows 4x. Deletes are
+    tombstones, reclaimed by compact(). With path set, state persists there.
+
+    quantization ("none", "int8" or "pq") is trained alongside the lists. Once
+    trained, a search scores candidates from their codes, keeps the top
+    k * rerank and re-scores those exactly. An existing index keeps the mode
+    it was created with.
+
+    Every operation holds the index's lock, so callers may use it from
+    several threads (the async routes run it off the event loop, training
+    included).
+    """
+
+    ARRAY_FILES = {"vectors": "vectors.f32", "assign": "assign.i32", "codes": "codes.u8"}
+
+    def __init__(self, dim: int, path: Optional[str] = None, nprobe: int = 8,
+                 train_threshold: int = 4096, quantization: Optional[str] = None,
+                 pq_subvectors: Optional[int] = None, rerank: int = 4):
+        self.dim = dim
+        self.path = Path(path) if path else None
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.quantization = quantization
+        self.pq_subvectors = pq_subvectors
+        self.rerank = rerank
+        self.rows = 0
+        self.trained_rows = 0
+        self.centroids: Optional[np.ndarray] = None
+        self.row_ids: List[Optional[str]] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.metadata: Dict[str, Dict] = {}
+        self._list_arrays: List[np.ndarray] = []
+        self._list_pending: List[List[int]] = []
+        self._log = None
+        self._lock = threading.RLock()
+        self.stats = {"searches": 0, "candidates_scanned": 0, "reranked": 0}
+
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._finish_compaction()
+            self._read_settings()
+        self.quantization = self.quantization or "none"
+        self.quantizer = make_quantizer(self.quantization, dim, pq_subvectors)
+        self.codes = None
+        if self.quantizer is not None:
+            if self.path is not None:
+                self.quantizer.load(self.path / "quantizer.npz")
+            self.codes = GrowableArray(np.uint8, self.quantizer.code_size, self._file("codes.u8"))
+        self.vectors = GrowableArray(np.float32, dim, self._file("vectors.f32"))
+        self.assign = GrowableArray(np.int32, None, self._file("assign.i32"))
+        self.alive = np.zeros(self.vectors.capacity, dtype=bool)
+        if self.path is not None:
+            self._load()
+            self._log = open(self.path / "log.jsonl", "a", encoding="utf-8")
+
+    def _file(self, name: str) -> Optional[Path]:
+        return self.path / name if self.path is not None else None
+
+    # Persistence
+
+    def _write_header(self):
+        header = {
+            "dim": self.dim,
+            "nprobe": self.nprobe,
+            "trained_rows": self.trained_rows,
+            "quantization": self.quantization,
+            "pq_subvectors": self.pq_subvectors
+        }
+        with open(self.path / "header.json", "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        if self.centroids is not None:
+            np.save(self.path / "centroids.npy", self.centroids)
+        if self.quantizer is not None:
+            self.quantizer.save(self.path / "quantizer.npz")
+
+    def _read_settings(self):
+        """An existing index keeps the quantization it was built with"""
+        header_path = self.path / "header.json"
+        if not header_path.exists():
+            return
+        with open(header_path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        stored = header.get("quantization", "none")
+        if self.quantization is not None and stored != self.quantization:
+            print(f"⚠️ Index at {self.path} uses '{stored}' quantization, ignoring '{self.quantization}'")
+        self.quantization = stored
+        self.pq_subvectors = header.get("pq_subvectors")
+
+    def _load(self):
+        header_path = self.path / "header.json"
+        if header_path.exists():
+            with open(header_path, "r", encoding="utf-8") as f:
+                header = json.load(f)
+            if header["dim"] != self.dim:
+                raise ValueError(f"Index at {self.path} has dim {header['dim']}, expected {self.dim}")
+            self.trained_rows = header.get("trained_rows", 0)
+            if (self.path / "centroids.npy").exists():
+                self.centroids = np.load(self.path / "centroids.npy")
+        else:
+            self._write_header()
+
+        log_path = self.path / "log.jsonl"
+        if log_path.exists():
+            with open(log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry["op"] == "add":
+                        self._track_add(entry["id"], entry["row"], entry.get("metadata") or {})
+                    elif entry["op"] == "del":
+                        self._track_delete(entry["id"])
+        self._rebuild_lists()
+
+    def _finish_compaction(self):
+        """Complete a compaction that stopped while swapping files in, or drop one that never got that far"""
+        marker = self.path / "compact.json"
+        if marker.exists():
+            with open(marker, "r", encoding="utf-8") as f:
+                names = json.load(f)["files"]
+            for name in names:
+                tmp_path = self.path / f"{name}.tmp"
+                if tmp_path.exists():
+                    os.replace(tmp_path, self.path / name)
+            marker.unlink()
+        for name in [*self.ARRAY_FILES.values(), "log.jsonl", "compact.json"]:
+            tmp_path = self.path / f"{name}.tmp"
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _append_log(self, entry: Dict):
+        if self._log is not None:
+            self._log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        """Push memory-mapped pages and the log to disk"""
+        self.vectors.flush()
+        self.assign.flush()
+        if self.codes is not None:
+            self.codes.flush()
+        if self._log is not None:
+            self._log.flush()
+
+    # Bookkeeping
+
+    def _track_add(self, item_id: str, row: int, metadata: Dict):
+        self.rows = max(self.rows, row + 1)
+        if len(self.alive) < self.vectors.capacity:
+            alive = np.zeros(self.vectors.capacity, dtype=bool)
+            alive[:len(self.alive)] = self.alive
+            self.alive = alive
+        while len(self.row_ids) <= row:
+            self.row_ids.append(None)
+        self.row_ids[row] = item_id
+        self.id_to_row[item_id] = row
+        self.metadata[item_id] = metadata
+        self.alive[row] = True
+
+    def _track_delete(self, item_id: str) -> bool:
+        row = self.id_to_row.pop(item_id, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        self.row_ids[row] = None
+        self.metadata.pop(item_id, None)
+        return True
+
+    def _rebuild_lists(self):
+        nlist = len(self.centroids) if self.centroids is not None else 0
+        assign = self.assign.data[:self.rows]
+        order = np.argsort(assign, kind="stable").astype(np.int64)
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        self._list_arrays = [order[bounds[i]:bounds[i + 1]] for i in range(nlist)]
+        self._list_pending = [[] for _ in range(nlist)]
+
+    def _list_rows(self, list_id: int) -> np.ndarray:
+        pending = self._list_pending[list_id]
+        if pending:
+            self._list_arrays[list_id] = np.concatenate(
+                [self._list_arrays[list_id], np.asarray(pending, dtype=np.int64)]
+            )
+            pending.clear()
+        return self._list_arrays[list_id]
+
+    # Mutations
+
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    def add(self, ids: List[str], vectors: np.ndarray, metadata: Optional[List[Dict]] = None):
+        """Insert (or replace) vectors under string ids with optional metadata; a repeated id keeps its last entry"""
+        vectors = self._normalise(np.atleast_2d(vectors))
+        if vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"Expected {len(ids)} vectors of dim {self.dim}, got {vectors.shape}")
+        metadata = metadata or [{} for _ in ids]
+        if len(metadata) != len(ids):
+            raise ValueError(f"Got {len(metadata)} metadata entries for {len(ids)} ids")
+        last = {item_id: position for position, item_id in enumerate(ids)}
+        if len(last) < len(ids):
+            keep = sorted(last.values())
+            ids, vectors, metadata = [ids[i] for i in keep], vectors[keep], [metadata[i] for i in keep]
+        with self._lock:
+            self._add(ids, vectors, metadata)
+
+    def _add(self, ids: List[str], vectors: np.ndarray, metadata: List[Dict]):
+        self.delete([item_id for item_id in ids if item_id in self.id_to_row])
+
+        start = self.rows
+        end = start + len(ids)
+        self.vectors.ensure(end)
+        self.assign.ensure(end)
+        self.vectors.data[start:end] = vectors
+        if self.centroids is not None:
+            lists = np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+        else:
+            lists = np.zeros(len(ids), dtype=np.int32)
+        self.assign.data[start:end] = lists
+        if self._quantized:
+            self.codes.ensure(end)
+            self.codes.data[start:end] = self.quantizer.encode(vectors)
+
+        for offset, (item_id, meta) in enumerate(zip(ids, metadata)):
+            row = start + offset
+            self._track_add(item_id, row, meta)
+            self._append_log({"op": "add", "id": item_id, "row": row, "metadata": meta})
+            if self.centroids is not None:
+                self._list_pending[lists[offset]].append(row)
+        self.flush()
+
+        live = len(self.id_to_row)
+        if live >= self.train_threshold and (self.centroids is None or live >= 4 * self.trained_rows):
+            self._train()
+
+    def delete(self, ids: List[str]) -> int:
+        """Tombstone ids; returns how many existed"""
+        removed = 0
+        with self._lock:
+            for item_id in ids:
+                if self._track_delete(item_id):
+                    self._append_log({"op": "del", "id": item_id})
+                    removed += 1
+            if removed:
+                self.flush()
+        return removed
+
+    def train(self, nlist: Optional[int] = None):
+        """(Re)cluster live vectors into nlist inverted lists (default ~sqrt(n))"""
+        with self._lock:
+            self._train(nlist)
+
+    def _train(self, nlist: Optional[int] = None):
+        live_rows = np.flatnonzero(self.alive[:self.rows])
+        if len(live_rows) == 0:
+            return
+        nlist = nlist or max(1, min(int(np.sqrt(len(live_rows))), 65536))
+        nlist = min(nlist, len(live_rows))
+        rng = np.random.default_rng(0)
+        sample_size = min(len(live_rows), 32 * nlist)
+        sample = np.sort(rng.choice(live_rows, sample_size, replace=False))
+        training = np.asarray(self.vectors.data[sample])
+        self.centroids = spherical_kmeans(training, nlist)
+        if self.quantizer is not None and len(training) >= self.quantizer.min_training:
+            self.quantizer.train(training)
+            self.codes.ensure(self.rows)
+
+        # Assign (and encode) in chunks so the score matrix stays small
+        for start in range(0, self.rows, 65536):
+            chunk = np.asarray(self.vectors.data[start:start + 65536])
+            self.assign.data[start:start + len(chunk)] = np.argmax(chunk @ self.centroids.T, axis=1)
+            if self._quantized:
+                self.codes.data[start:start + len(chunk)] = self.quantizer.encode(chunk)
+        self.trained_rows = len(live_rows)
+        self._rebuild_lists()
+        self.flush()
+        if self.path is not None:
+            self._write_header()
+
+    def compact(self):
+        """
+        Drop tombstoned rows. Live rows are copied into temporary files, which
+        replace the originals (os.replace) only once all of them are written:
+        a crash before then leaves the index as it was, and one during the
+        swap is finished the next time the index opens.
+        """
+        with self._lock:
+            live_rows = np.flatnonzero(self.alive[:self.rows])
+            ids = [self.row_ids[row] for row in live_rows]
+            compacted = {}
+            for attr, name in self.ARRAY_FILES.items():
+                current = getattr(self, attr)
+                if current is None:
+                    continue
+                tmp_path = self._file(f"{name}.tmp")
+                if tmp_path is not None and tmp_path.exists():
+                    tmp_path.unlink()
+                array = GrowableArray(current.dtype, current.cols, tmp_path, capacity=max(len(ids), 1))
+                if attr != "codes" or self._quantized:
+                    for start in range(0, len(live_rows), 65536):
+                        chunk = live_rows[start:start + 65536]
+                        array.data[start:start + len(chunk)] = current.data[chunk]
+                array.flush()
+                compacted[attr] = array
+
+            if self.path is not None:
+                with open(self.path / "log.jsonl.tmp", "w", encoding="utf-8") as f:
+                    for row, item_id in enumerate(ids):
+                        entry = {"op": "add", "id": item_id, "row": row, "metadata": self.metadata[item_id]}
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                # Commit point: from here on an interrupted swap is rolled forward on open
+                names = [self.ARRAY_FILES[attr] for attr in compacted] + ["log.jsonl"]
+                with open(self.path / "compact.json.tmp", "w", encoding="utf-8") as f:
+                    json.dump({"files": names}, f)
+                os.replace(self.path / "compact.json.tmp", self.path / "compact.json")
+                self._log.close()
+                for name in names:
+                    os.replace(self.path / f"{name}.tmp", self.path / name)
+                (self.path / "compact.json").unlink()
+                self._log = open(self.path / "log.jsonl", "a", encoding="utf-8")
+                for attr, array in compacted.items():
+                    array.path = self.path / self.ARRAY_FILES[attr]
+
+            for attr, array in compacted.items():
+                setattr(self, attr, array)
+            self.rows = len(ids)
+            self.row_ids = ids
+            self.id_to_row = {item_id: row for row, item_id in enumerate(ids)}
+            self.alive = np.zeros(self.vectors.capacity, dtype=bool)
+            self.alive[:len(ids)] = True
+            self._rebuild_lists()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    # Queries
+
+    @property
+    def _quantized(self) -> bool:
+        return self.quantizer is not None and self.quantizer.trained
+
+    @staticmethod
+    def _matches(metadata: Dict, filters: Dict) -> bool:
+        for key, expected in filters.items():
+            value = metadata.get(key)
+            if isinstance(expected, (list, tuple, set)):
+                if value not in expected:
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    def _candidate_rows(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        if self.centroids is None:
+            return np.arange(self.rows)
+        nprobe = min(nprobe, len(self.centroids))
+        closest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self._list_rows(list_id) for list_id in closest])
+
+    def search(self, query: np.ndarray, k: int = 10, filters: Optional[Dict] = None,
+               nprobe: Optional[int] = None) -> List[Dict]:
+        """Top-k {"id", "score", "metadata"} by cosine similarity, optionally filtered on metadata"""
+        query = self._normalise(np.asarray(query, dtype=np.float32).reshape(-1))
+        with self._lock:
+            return self._search(query, k, filters, nprobe)
+
+    def _search(self, query: np.ndarray, k: int, filters: Optional[Dict], nprobe: Optional[int]) -> List[Dict]:
+        rows = self._candidate_rows(query, nprobe or self.nprobe)
+        rows = rows[self.alive[rows]]
+        self.stats["searches"] += 1
+        self.stats["candidates_scanned"] += len(rows)
+        if len(rows) == 0:
+            return []
+
+        # Stage one scores codes, stage two re-scores the survivors exactly
+        quantized = self._quantized
+        if quantized:
+            scores = self.quantizer.scorer(query)(np.asarray(self.codes.data[rows]))
+            keep = k * self.rerank
+        else:
+            scores = np.asarray(self.vectors.data[rows]) @ query
+            keep = k
+
+        if filters:
+            order = np.argsort(-scores)
+        else:
+            top = min(keep, len(rows))
+            order = np.argpartition(-scores, top - 1)[:top]
+            order = order[np.argsort(-scores[order])]
+
+        picked = []
+        for position in order:
+            if filters and not self._matches(self.metadata.get(self.row_ids[rows[position]], {}), filters):
+                continue
+            picked.append(position)
+            if len(picked) == keep:
+                break
+        picked = np.asarray(picked, dtype=np.int64)
+
+        if quantized and len(picked):
+            self.stats["reranked"] += len(picked)
+            exact = np.asarray(self.vectors.data[rows[picked]]) @ query
+            best = np.argsort(-exact, kind="stable")[:k]
+            picked, final = picked[best], exact[best]
+        else:
+            final = scores[picked]
+
+        results = []
+        for position, score in zip(picked, final):
+            item_id = self.row_ids[rows[position]]
+            results.append({"id": item_id, "score": float(score), "metadata": self.metadata.get(item_id, {})})
+        return results
+
+    def __len__(self) -> int:
+        return len(self.id_to_row)
+
+    def get_stats(self) -> Dict:
+        searches = self.stats["searches"]
+        return {
+            "vectors": len(self),
+            "tombstones": self.rows - len(self),
+            "dim": self.dim,
+            "trained": self.centroids is not None,
+            "lists": len(self.centroids) if self.centroids is not None else 0,
+            "nprobe": self.nprobe,
+            "quantization": self.quantizer.get_stats() if self.quantizer is not None else {"mode": "none"},
+            "rerank": self.rerank,
+            "reranked": self.stats["reranked"],
+            "avg_candidates": round(self.stats["candidates_scanned"] / searches, 1) if searches else 0,
+            "searches": searches,
+            "path": str(self.path) if self.path else None
+        }
@@ -0,0 +1,90 @@
+"""
+Latency Histogram - HDR-style latency recording for the ngahere
+Log-linear buckets give constant-time recording and a bounded relative error
+on every percentile, with memory fixed by the tracked range, not the sample count.
+"""
+
+import threading
+from typing import Dict, List
+
+class LatencyHistogram:
+    """
+    Fixed-size, log-linear latency histogram.
+    Values are recorded in microseconds. Below 2 * sub_buckets they are exact;
+    above that each power-of-two range is split into sub_buckets linear steps,
+    so any reported percentile is within 1 / sub_buckets of the true value.
+    """
+
+    def __init__(self, precision_bits: int = 5, max_seconds: float = 3600.0):
+        self.sub_buckets = 1 << precision_bits
+        self.max_value = int(max_seconds * 1_000_000)
+        self.counts: List[int] = [0] * (self._index(self.max_value) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def _index(self, value: int) -> int:
+        sub = self.sub_buckets
+        if value < 2 * sub:
+            return value
+        shift = value.bit_length() - (sub.bit_length())
+        mantissa = value >> shift
+        return 2 * sub + (shift - 1) * sub + (mantissa - sub)
+
+    def _value_at(self, index: int) -> int:
+        """Midpoint of the range covered by a bucket"""
+        sub = self.sub_buckets
+        if index < 2 * sub:
+            return index
+        shift = (index - 2 * sub) // sub + 1
+        mantissa = (index - 2 * sub) % sub + sub
+        low = mantissa << shift
+        return low + ((1 << shift) >> 1)
+
+    def record(self, seconds: float):
+        """Record one latency sample"""
+        value = min(max(int(seconds * 1_000_000), 0), self.max_value)
+        index = self._index(value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percentile: float) -> float:
+        """Latency in seconds at the given percentile (0-100); 0.0 when empty"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = max(1, int(round(self.count * percentile / 100.0)))
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= target:
+                    value = min(self._value_at(index), self.max)
+                    return max(value, self.min) / 1_000_000
+            return self.max / 1_000_000
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * len(self.counts)
+            self.count = 0
+            self.total = 0
+            self.min = None
+            self.max = None
+
+    def to_dict(self) -> Dict:
+        """Count, mean and p50/p95/p99 in milliseconds"""
+        mean = self.total / self.count / 1000 if self.count else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(mean, 3),
+            "min_ms": round(self.min / 1000, 3) if self.min is not None else None,
+            "max_ms": round(self.max / 1000, 3) if self.max is not None else None,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3)
+        }
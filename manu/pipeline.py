@@ -0,0 +1,303 @@
+"""
+Pipeline - Streaming stages joined by bounded queues
+Each stage runs its own workers and hands items downstream through a bounded
+asyncio queue, so a full queue pauses the stage before it (backpressure) and
+items flow through as soon as they are ready. Wall time tracks the slowest
+stage instead of the sum of all of them.
+"""
+
+import os
+import time
+import asyncio
+import threading
+import inspect
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+_DONE = object()
+
+class Stage:
+    """
+    One step of a pipeline. fn takes an item and returns the item to pass on;
+    returning None drops the item. A stage given a batch_size is batched: fn
+    always takes and returns a list (of up to batch_size items), even when
+    batch_size is 1. Plain functions run in threads so they never block the
+    event loop.
+    """
+
+    def __init__(self, name: str, fn: Callable, workers: int = 1, queue_size: int = 16,
+                 batch_size: Optional[int] = None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(workers, 1)
+        self.queue_size = max(queue_size, 1)
+        self.batched = batch_size is not None
+        self.batch_size = max(batch_size or 1, 1)
+        self.reset()
+
+    def reset(self):
+        self.stats = {"items_in": 0, "items_out": 0, "dropped": 0, "errors": 0, "busy_seconds": 0.0,
+                      "max_queue_depth": 0}
+        self.errors: List[str] = []
+
+    async def call(self, payload: Any) -> Any:
+        if inspect.iscoroutinefunction(self.fn):
+            return await self.fn(payload)
+        return await asyncio.to_thread(self.fn, payload)
+
+class Pipeline:
+    """
+    Source iterable -> stage -> stage -> ... A failing item is counted and
+    logged on its stage and dropped; the rest of the run carries on. The
+    source is reported like a stage: wait_seconds is time spent waiting for it
+    to produce, blocked_seconds time it spent paused by backpressure. A source
+    that raises ends the run early: items already fed finish, and the
+    exception is reported as the source's error.
+    """
+
+    max_logged_errors = 20
+
+    def __init__(self, stages: List[Stage], source_name: str = "source"):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.source_name = source_name
+        self.running = False
+        self.started_at: Optional[float] = None
+        self.wall_seconds = 0.0
+        self.source_stats = {}
+        self._stopping = False
+
+    async def _feed(self, source: Iterable, queue: asyncio.Queue):
+        """Push source items into the first queue; a blocking iterator is drained in a thread"""
+        loop = asyncio.get_running_loop()
+        stats = self.source_stats
+
+        if hasattr(source, "__aiter__"):
+            iterator = source.__aiter__()
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                stats["wait_seconds"] += time.perf_counter() - started
+                stats["items"] += 1
+                started = time.perf_counter()
+                await queue.put(item)
+                stats["blocked_seconds"] += time.perf_counter() - started
+
+        def drain():
+            iterator = iter(source)
+            try:
+                while not self._stopping:
+                    started = time.perf_counter()
+                    item = next(iterator, _DONE)
+                    stats["wait_seconds"] += time.perf_counter() - started
+                    if item is _DONE:
+                        return
+                    stats["items"] += 1
+                    started = time.perf_counter()
+                    # Blocks this thread (and so the iterator) while the queue is full
+                    asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+                    stats["blocked_seconds"] += time.perf_counter() - started
+            finally:
+                if hasattr(iterator, "close"):
+                    iterator.close()
+
+        await asyncio.to_thread(drain)
+
+    async def _worker(self, stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            batch = [item]
+            while len(batch) < stage.batch_size and not inbox.empty():
+                extra = inbox.get_nowait()
+                if extra is _DONE:
+                    # Let this worker finish its batch, then stop
+                    await inbox.put(_DONE)
+                    break
+                batch.append(extra)
+            stage.stats["items_in"] += len(batch)
+            stage.stats["max_queue_depth"] = max(stage.stats["max_queue_depth"], inbox.qsize() + len(batch))
+
+            started = time.perf_counter()
+            try:
+                result = await stage.call(batch if stage.batched else batch[0])
+            except Exception as e:
+                stage.stats["errors"] += len(batch)
+                if len(stage.errors) < self.max_logged_errors:
+                    stage.errors.append(f"{type(e).__name__}: {e}")
+                continue
+            finally:
+                stage.stats["busy_seconds"] += time.perf_counter() - started
+
+            outputs = result if stage.batched else [result]
+            outputs = [output for output in (outputs or []) if output is not None]
+            stage.stats["dropped"] += len(batch) - len(outputs)
+            stage.stats["items_out"] += len(outputs)
+            if outbox is not None:
+                for output in outputs:
+                    await outbox.put(output)
+
+    async def _run_stage(self, stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue],
+                         downstream_workers: int):
+        await asyncio.gather(*(self._worker(stage, inbox, outbox) for _ in range(stage.workers)))
+        if outbox is not None:
+            for _ in range(downstream_workers):
+                await outbox.put(_DONE)
+
+    async def run(self, source: Iterable) -> Dict:
+        """Stream every source item through the stages and return the throughput report"""
+        if self.running:
+            raise RuntimeError("Pipeline is already running")
+        self.running = True
+        self._stopping = False
+        self.source_stats = {"items": 0, "wait_seconds": 0.0, "blocked_seconds": 0.0}
+        self.started_at = time.perf_counter()
+        for stage in self.stages:
+            stage.reset()
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+
+        async def feed():
+            try:
+                await self._feed(source, queues[0])
+            except Exception as e:
+                self.source_stats["error"] = f"{type(e).__name__}: {e}"
+            finally:
+                for _ in range(self.stages[0].workers):
+                    await queues[0].put(_DONE)
+
+        try:
+            tasks = [feed()]
+            for position, stage in enumerate(self.stages):
+                last = position == len(self.stages) - 1
+                tasks.append(self._run_stage(
+                    stage, queues[position],
+                    None if last else queues[position + 1],
+                    0 if last else self.stages[position + 1].workers
+                ))
+            await asyncio.gather(*tasks)
+        finally:
+            self.wall_seconds = time.perf_counter() - self.started_at
+            self.running = False
+            # If the run was cancelled, free a source thread blocked on a full queue
+            self._stopping = True
+            while not queues[0].empty():
+                queues[0].get_nowait()
+        return self.report()
+
+    def report(self) -> Dict:
+        wall = self.wall_seconds or (time.perf_counter() - self.started_at if self.started_at else 0.0)
+        stages = {}
+        for stage in self.stages:
+            busy = stage.stats["busy_seconds"]
+            stages[stage.name] = {
+                **stage.stats,
+                "busy_seconds": round(busy, 3),
+                "workers": stage.workers,
+                "batch_size": stage.batch_size,
+                "queue_size": stage.queue_size,
+                "items_per_second": round(stage.stats["items_in"] / wall, 2) if wall else 0.0,
+                # Share of its workers' time the stage spent working; the bottleneck is near 1
+                "utilisation": round(busy / (wall * stage.workers), 3) if wall else 0.0,
+                "errors_sample": stage.errors[:5]
+            }
+        bottleneck = max(stages, key=lambda name: stages[name]["utilisation"]) if wall else None
+        source = {key: round(value, 3) if isinstance(value, float) else value
+                  for key, value in self.source_stats.items()}
+        if wall:
+            source["items_per_second"] = round(self.source_stats.get("items", 0) / wall, 2)
+        return {
+            "running": self.running,
+            "source": {"name": self.source_name, **source},
+            "wall_seconds": round(wall, 3),
+            "bottleneck": bottleneck,
+            "stages": stages
+        }
+
+class IngestPipeline:
+    """
+    Kārearea → Ruru → Kōtare: scan pages, summarise each, embed in batches and
+    index into a Kōtare collection. Page ids are "<document>#p<page>", so
+    re-ingesting a document replaces its pages instead of duplicating them.
+    """
+
+    def __init__(self, karearea, ruru, kotare, summarise_workers: Optional[int] = None,
+                 embed_batch: Optional[int] = None, queue_size: Optional[int] = None):
+        self.karearea = karearea
+        self.ruru = ruru
+        self.kotare = kotare
+        self.summarise_workers = summarise_workers or int(os.getenv("PIPELINE_SUMMARISE_WORKERS") or 4)
+        self.embed_batch = embed_batch or int(os.getenv("PIPELINE_EMBED_BATCH") or 32)
+        self.queue_size = queue_size or int(os.getenv("PIPELINE_QUEUE_SIZE") or 16)
+        self._lock = threading.Lock()
+        self.last_report: Optional[Dict] = None
+        self.active: Optional[Pipeline] = None
+
+    def build(self, collection: str, summarise: bool = True) -> Pipeline:
+        async def summarise_page(page: Dict) -> Dict:
+            page["summary"] = await self.ruru.asummarise(page["clean_text"])
+            return page
+
+        def embed(pages: List[Dict]) -> List[Dict]:
+            texts = [page["summary"]["medium"] if "summary" in page else page["clean_text"] for page in pages]
+            for page, vector in zip(pages, self.kotare.embed(texts)):
+                page["vector"] = vector
+            return pages
+
+        def index(pages: List[Dict]) -> List[Dict]:
+            metadata = []
+            for page in pages:
+                meta = {"document": page["document"], "page": page["page"], "text": page["clean_text"]}
+                if "summary" in page:
+                    meta["summary"] = page["summary"]["short"]
+                metadata.append(meta)
+            ids = [f"{page['document']}#p{page['page']}" for page in pages]
+            self.kotare.collection(collection).add(ids, [page.pop("vector") for page in pages], metadata)
+            return [{"id": item_id} for item_id in ids]
+
+        stages = []
+        if summarise:
+            stages.append(Stage("summarise", summarise_page, workers=self.summarise_workers,
+                                queue_size=self.queue_size))
+        stages.append(Stage("embed", embed, workers=1, queue_size=self.queue_size, batch_size=self.embed_batch))
+        stages.append(Stage("index", index, workers=1, queue_size=self.queue_size, batch_size=self.embed_batch))
+        return Pipeline(stages, source_name="scan")
+
+    @staticmethod
+    def _readable_pages(pages: Iterator[Dict], skipped: Dict) -> Iterator[Dict]:
+        """Scanned pages with text; failed and blank pages are counted, not passed on"""
+        try:
+            for page in pages:
+                if "error" in page:
+                    skipped["failed"] += 1
+                elif not page.get("clean_text", "").strip():
+                    skipped["blank"] += 1
+                else:
+                    yield page
+        finally:
+            pages.close()
+
+    async def ingest(self, path: str, collection: str = "default", summarise: bool = True) -> Dict:
+        """Ingest a PDF, image or directory as one streaming run"""
+        skipped = {"failed": 0, "blank": 0}
+        # Scanning starts here so a missing path fails before the pipeline does
+        pages = self._readable_pages(self.karearea.scan_pages(path), skipped)
+        pipeline = self.build(collection, summarise)
+        with self._lock:
+            self.active = pipeline
+        try:
+            report = await pipeline.run(pages)
+        finally:
+            with self._lock:
+                self.active = None
+        report["source"]["skipped"] = skipped
+        self.last_report = {"path": path, "collection": collection, **report}
+        return self.last_report
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            active = self.active.report() if self.active is not None else None
+        return {"active": active, "last_run": self.last_report}
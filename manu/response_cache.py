@@ -0,0 +1,159 @@
+"""
+Response Cache - Content-addressed cache for Cloud Kaitiaki generations
+An in-memory LRU tier in front of an optional on-disk SQLite tier, both
+bounded by size and TTL, so identical prompts stop costing a provider call.
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+class ResponseCache:
+    """
+    Generation cache keyed on (model, prompt, temperature, max_tokens).
+    Sampling with temperature > 0 is not repeatable, so those generations
+    bypass the cache unless allow_nondeterministic is set or the caller opts in.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0,
+                 sqlite_path: Optional[str] = None, disk_max_entries: int = 100_000,
+                 allow_nondeterministic: bool = False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sqlite_path = sqlite_path
+        self.disk_max_entries = disk_max_entries
+        self.allow_nondeterministic = allow_nondeterministic
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "stores": 0
+        }
+        if sqlite_path:
+            Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """Content address for one generation request"""
+        payload = json.dumps([model, prompt, float(temperature), int(max_tokens)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def should_cache(self, temperature: float, opt_in: Optional[bool] = None) -> bool:
+        """Whether a request may be served from / stored in the cache"""
+        if opt_in is not None:
+            allowed = opt_in
+        else:
+            allowed = temperature <= 0 or self.allow_nondeterministic
+        if not allowed:
+            with self._lock:
+                self.stats["bypassed"] += 1
+        return allowed
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self.stats["expirations"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if now - created_at <= self.ttl:
+                        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, value, created_at)
+                        self.stats["hits"] += 1
+                        self.stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.stats["expirations"] += 1
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str):
+        """Store a response in every tier"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self.stats["stores"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                overflow = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.disk_max_entries
+                if overflow > 0:
+                    self._db.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                        (overflow,)
+                    )
+                    self.stats["evictions"] += overflow
+                self._db.commit()
+
+    def _remember(self, key: str, value: str, created_at: float):
+        """Insert into the memory tier, evicting least recently used entries (lock held)"""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def get_stats(self) -> Dict:
+        """Hit / miss / eviction counters and tier sizes"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            disk_entries = None
+            if self._db is not None:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "disk_entries": disk_entries,
+                "disk_max_entries": self.disk_max_entries if self._db is not None else None,
+                "ttl_seconds": self.ttl,
+                "allow_nondeterministic": self.allow_nondeterministic
+            }
@@ -0,0 +1,201 @@
+"""
+Route Metrics - Per-route latency and throughput for every manu router
+A thin ASGI middleware times each request and files it under its route
+template (e.g. /jobs/{job_id}), so paths with ids don't explode the label set.
+Latency goes into a LatencyHistogram per route; counts, status classes and
+errors are plain counters, and in-flight requests are read from the live set.
+"""
+
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from manu.latency_histogram import LatencyHistogram
+
+UNMATCHED = "<unmatched>"
+
+class RouteStats:
+    """Counters and latency histogram for one method + route"""
+
+    __slots__ = ("latency", "count", "errors", "statuses")
+
+    def __init__(self):
+        self.latency = LatencyHistogram(max_seconds=600.0)
+        self.count = 0
+        self.errors = 0  # 5xx responses and unhandled exceptions
+        self.statuses: Dict[str, int] = {}
+
+    def to_dict(self, in_flight: int, uptime: float) -> Dict:
+        return {
+            "requests": self.count,
+            "in_flight": in_flight,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 4) if self.count else 0.0,
+            "requests_per_second": round(self.count / uptime, 3) if uptime else 0.0,
+            "statuses": dict(self.statuses),
+            "latency": self.latency.to_dict()
+        }
+
+class RouteMetrics:
+    """Registry the middleware writes to and Tauhou and /metrics read from"""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.started_at = time.time()
+        self._active: Dict[int, dict] = {}  # id(scope) -> scope of requests still running
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def route_of(scope: dict) -> str:
+        """
+        Route template the router matched (set on the scope during routing).
+        Some FastAPI versions put the router's own route there, without the
+        include_router prefix; the prefix is then whatever part of the request
+        path comes before the route's pattern matches.
+        """
+        route = scope.get("route")
+        template = getattr(route, "path", None)
+        if template is None:
+            return UNMATCHED
+        regex = getattr(route, "path_regex", None)
+        path = scope.get("path", "")
+        root = scope.get("root_path", "")
+        if root and path.startswith(root):
+            path = path[len(root):]
+        if regex is None or regex.match(path):
+            return template
+        start = path.find("/", 1)
+        while start != -1:
+            if regex.match(path[start:]):
+                return path[:start] + template
+            start = path.find("/", start + 1)
+        return template
+
+    def started(self, scope: dict):
+        self._active[id(scope)] = scope
+
+    def finished(self, scope: dict, status: int, seconds: float, failed: bool = False):
+        self._active.pop(id(scope), None)
+        key = (scope.get("method", ""), self.route_of(scope))
+        stats = self.routes.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self.routes.setdefault(key, RouteStats())
+        stats.latency.record(seconds)
+        status_class = f"{status // 100}xx"
+        with self._lock:
+            stats.count += 1
+            stats.statuses[status_class] = stats.statuses.get(status_class, 0) + 1
+            if failed or status >= 500:
+                stats.errors += 1
+
+    def in_flight(self) -> Dict[Tuple[str, str], int]:
+        counts: Dict[Tuple[str, str], int] = {}
+        for scope in list(self._active.values()):
+            key = (scope.get("method", ""), self.route_of(scope))
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def get_stats(self, top: Optional[int] = None) -> Dict:
+        """Every route, busiest first (by total time spent), with p50/p95/p99 latency"""
+        uptime = time.time() - self.started_at
+        in_flight = self.in_flight()
+        with self._lock:
+            items = list(self.routes.items())
+        items.sort(key=lambda item: -item[1].latency.total)
+        routes = {
+            f"{method} {path}": stats.to_dict(in_flight.get((method, path), 0), uptime)
+            for (method, path), stats in items[:top]
+        }
+        return {
+            "uptime_seconds": round(uptime, 1),
+            "requests": sum(stats.count for _, stats in items),
+            "in_flight": sum(in_flight.values()),
+            "routes": routes
+        }
+
+    def prometheus(self) -> List[str]:
+        """Route metrics in the Prometheus text exposition format"""
+        in_flight = self.in_flight()
+        with self._lock:
+            items = sorted(self.routes.items())
+        lines = [
+            "# HELP ngahere_http_requests_total Requests handled, by route and status class.",
+            "# TYPE ngahere_http_requests_total counter"
+        ]
+        for (method, path), stats in items:
+            for status_class, count in sorted(stats.statuses.items()):
+                lines.append(f'ngahere_http_requests_total{{{_labels(method, path)},status="{status_class}"}} {count}')
+        lines += [
+            "# HELP ngahere_http_request_errors_total Requests that ended in a 5xx or an unhandled exception.",
+            "# TYPE ngahere_http_request_errors_total counter"
+        ]
+        lines += [f"ngahere_http_request_errors_total{{{_labels(method, path)}}} {stats.errors}"
+                  for (method, path), stats in items]
+        lines += [
+            "# HELP ngahere_http_request_duration_seconds Request latency, by route.",
+            "# TYPE ngahere_http_request_duration_seconds summary"
+        ]
+        for (method, path), stats in items:
+            labels = _labels(method, path)
+            for quantile in (0.5, 0.95, 0.99):
+                value = stats.latency.percentile(quantile * 100)
+                lines.append(f'ngahere_http_request_duration_seconds{{{labels},quantile="{quantile}"}} {value:.6f}')
+            lines.append(f"ngahere_http_request_duration_seconds_sum{{{labels}}} {stats.latency.total / 1_000_000:.6f}")
+            lines.append(f"ngahere_http_request_duration_seconds_count{{{labels}}} {stats.latency.count}")
+        lines += [
+            "# HELP ngahere_http_requests_in_flight Requests currently being handled, by route.",
+            "# TYPE ngahere_http_requests_in_flight gauge"
+        ]
+        keys = sorted(set(in_flight) | {key for key, _ in items})
+        lines += [f"ngahere_http_requests_in_flight{{{_labels(*key)}}} {in_flight.get(key, 0)}" for key in keys]
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+            self.started_at = time.time()
+
+def _labels(method: str, path: str) -> str:
+    path = path.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{path}"'
+
+# Shared by the middleware, Tauhou and the /metrics route
+route_metrics = RouteMetrics()
+
+class RouteMetricsMiddleware:
+    """
+    Pure ASGI middleware (no request/response wrapping, so streaming responses
+    pass straight through). Latency runs until the last body chunk is sent.
+    """
+
+    def __init__(self, app, metrics: Optional[RouteMetrics] = None):
+        self.app = app
+        self.metrics = metrics or route_metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        started = time.perf_counter()
+        status = 500
+        metrics.started(scope)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            metrics.finished(scope, 500, time.perf_counter() - started, failed=True)
+            raise
+        except BaseException:
+            # Cancelled, typically because the client went away: 499 as in nginx, not a server error
+            metrics.finished(scope, 499, time.perf_counter() - started)
+            raise
+        metrics.finished(scope, status, time.perf_counter() - started)
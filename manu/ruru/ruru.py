@@ -1,7 +1,83 @@
+import os
+import yaml
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+from manu.response_cache import ResponseCache
+from manu.ruru.summariser import MapReduceSummariser
+
+SUMMARISE_PROMPT = Path(__file__).resolve().parents[1] / "piwakawaka" / "prompts" / "summerise.yaml"
+
 class Ruru:
     def __init__(self):
         self.name = "Ruru"
+        self.preferred_model = os.getenv("RURU_PREFERRED_MODEL") or None
+        self._kaitiaki = None
+        self._summariser = None
+
+    @property
+    def kaitiaki(self):
+        """Cloud Kaitiaki, woken on first use"""
+        if self._kaitiaki is None:
+            from manu.cloud_kaitiaki import CloudKaitiaki
+            self._kaitiaki = CloudKaitiaki()
+        return self._kaitiaki
+
+    @property
+    def summariser(self) -> MapReduceSummariser:
+        """Map-reduce summariser over Cloud Kaitiaki, with a persistent chunk cache"""
+        if self._summariser is None:
+            cache = ResponseCache(
+                max_entries=1024,
+                ttl=float(os.getenv("RURU_CHUNK_CACHE_TTL") or 30 * 24 * 3600),
+                sqlite_path=os.getenv("RURU_CHUNK_CACHE_PATH") or str(Path(__file__).parent / "chunk_cache.sqlite3")
+            )
+            self._summariser = MapReduceSummariser(
+                lambda prompt: self.kaitiaki.agenerate_with_fallback(prompt, self.preferred_model),
+                instructions=self.summarise_instructions(),
+                max_tokens=int(os.getenv("RURU_CHUNK_TOKENS") or 1500),
+                max_concurrency=int(os.getenv("RURU_MAX_CONCURRENCY") or 8),
+                max_reduce_rounds=int(os.getenv("RURU_MAX_REDUCE_ROUNDS") or 8),
+                cache=cache,
+                cache_namespace=self.preferred_model or "auto"
+            )
+        return self._summariser
+
+    async def asummarise(self, text: str) -> Dict:
+        """Ruru summarises text with wisdom: short, medium and long layers, however long the text"""
+        return await self.summariser.summarise(text)
+
+    def summarise_stream(self, text: str) -> AsyncIterator[Dict]:
+        """Ruru calls out the short layer first, then medium, then long"""
+        return self.summariser.stream(text)
+
+    def summarise(self, text: str) -> Dict:
+        """
+        Blocking asummarise, for scripts and threads with no event loop
+        running. Inside a loop (a route, a task) await asummarise instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.asummarise(text))
+        raise RuntimeError("Ruru.summarise was called inside a running event loop; await Ruru.asummarise instead")
+
+    @staticmethod
+    def summarise_instructions() -> str:
+        """The summerise.yaml steps as a bullet list"""
+        with open(SUMMARISE_PROMPT, "r", encoding="utf-8") as f:
+            steps = yaml.safe_load(f).get("steps", [])
+        return "\n".join(f"- {step}" for step in steps)
+
+    def summarise_prompt(self, text: str) -> str:
+        """Build the summerise.yaml prompt around one piece of text"""
+        return f"{self.summarise_instructions()}\n\nContent:\n{text}"
 
-    def summarise(self, text: str) -> str:
-        """Ruru summarises text with wisdom"""
-        return f"Ruru summarises: {text[:100]}..."
\ No newline at end of file
+    async def summarise_batch(self, texts: List[str], max_concurrency: int = 8,
+                              preferred_model: Optional[str] = None) -> List[Dict]:
+        """Ruru summarises many texts (e.g. scanned pages) in parallel, in order"""
+        prompts = [self.summarise_prompt(text) for text in texts]
+        return await self.kaitiaki.agenerate_batch(
+            prompts, preferred_model or self.preferred_model, max_concurrency
+        )
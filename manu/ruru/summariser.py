@@ -0,0 +1,204 @@
+"""
+Ruru Summariser - Map-reduce summaries in short, medium and long layers
+Long text is cut into token-bounded chunks, the chunks are summarised
+concurrently (map), and the partial summaries are folded together until they
+fit one prompt (reduce) before the three summerise.yaml layers are written.
+Chunk summaries are cached by content, so an edited document only pays for
+the chunks that changed.
+"""
+
+import re
+import asyncio
+import hashlib
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from manu.response_cache import ResponseCache
+
+_TOKEN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+LAYERS = {
+    "short": "Summarise into one line.",
+    "medium": "Summarise into one paragraph.",
+    "long": "Write a detailed summary that keeps every important point, in several paragraphs."
+}
+
+def count_tokens(text: str) -> int:
+    """Approximate model tokens (words and punctuation marks)"""
+    return len(_TOKEN.findall(text))
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """The start of text, cut after its first max_tokens tokens"""
+    for position, match in enumerate(_TOKEN.finditer(text), 1):
+        if position == max_tokens:
+            return text[:match.end()]
+    return text
+
+def _split_oversized(paragraph: str, max_tokens: int) -> List[str]:
+    """Break a paragraph that alone exceeds max_tokens at sentences, then words"""
+    pieces, current, size = [], [], 0
+    for sentence in _SENTENCE.split(paragraph):
+        units = [sentence] if count_tokens(sentence) <= max_tokens else sentence.split()
+        for unit in units:
+            tokens = count_tokens(unit)
+            if current and size + tokens > max_tokens:
+                pieces.append(" ".join(current))
+                current, size = [], 0
+            current.append(unit)
+            size += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def chunk_text(text: str, max_tokens: int = 1500) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens along paragraph boundaries.
+    Boundaries are content-defined: once a chunk is a quarter full it also ends
+    after any paragraph whose hash is 0 mod 4. An edit therefore only moves
+    the chunk boundaries next to it, and the chunks after it stay the same.
+    """
+    paragraphs = []
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block:
+            continue
+        if count_tokens(block) > max_tokens:
+            paragraphs.extend(_split_oversized(block, max_tokens))
+        else:
+            paragraphs.append(block)
+
+    chunks, current, size = [], [], 0
+    for paragraph in paragraphs:
+        tokens = count_tokens(paragraph)
+        if current and size + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += tokens
+        anchor = hashlib.blake2b(paragraph.encode("utf-8"), digest_size=4).digest()[0] % 4 == 0
+        if anchor and size >= max_tokens // 4:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+class MapReduceSummariser:
+    """
+    generate is any async prompt -> text function (Cloud Kaitiaki by default
+    through Ruru). max_tokens bounds every prompt's content; max_concurrency
+    bounds simultaneous generations. A model that will not shorten its input
+    can't keep the reduce going forever: after max_reduce_rounds the folded
+    text is truncated to max_tokens.
+    """
+
+    def __init__(self, generate: Callable[[str], Awaitable[str]], instructions: str = "",
+                 max_tokens: int = 1500, max_concurrency: int = 8, cache: Optional[ResponseCache] = None,
+                 cache_namespace: str = "", max_reduce_rounds: int = 8):
+        self.generate = generate
+        self.instructions = instructions
+        self.max_tokens = max_tokens
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.cache_namespace = cache_namespace
+        self.max_reduce_rounds = max(max_reduce_rounds, 0)
+        self.stats = {"documents": 0, "chunks": 0, "chunks_cached": 0, "reduce_rounds": 0, "truncated": 0,
+                      "generations": 0}
+
+    def _prompt(self, task: str, content: str) -> str:
+        return f"{self.instructions}\n\nTask: {task}\n\nContent:\n{content}"
+
+    async def _generate(self, prompt: str, semaphore: asyncio.Semaphore) -> str:
+        async with semaphore:
+            self.stats["generations"] += 1
+            return (await self.generate(prompt)).strip()
+
+    async def _summarise_chunk(self, chunk: str, semaphore: asyncio.Semaphore) -> Tuple[str, bool]:
+        """A chunk's partial summary, and whether it came from the cache"""
+        prompt = self._prompt("Summarise this section in one detailed paragraph.", chunk)
+        key = ResponseCache.make_key(self.cache_namespace, prompt, 0.0, 0) if self.cache is not None else None
+        if key is not None:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                self.stats["chunks_cached"] += 1
+                return cached, True
+        summary = await self._generate(prompt, semaphore)
+        if key is not None:
+            await asyncio.to_thread(self.cache.set, key, summary)
+        return summary, False
+
+    async def _map(self, chunks: List[str], semaphore: asyncio.Semaphore) -> Tuple[List[str], int]:
+        results = await asyncio.gather(*(self._summarise_chunk(chunk, semaphore) for chunk in chunks))
+        return [summary for summary, _ in results], sum(1 for _, cached in results if cached)
+
+    async def condense(self, text: str, semaphore: Optional[asyncio.Semaphore] = None) -> Dict:
+        """Map and reduce text until it fits one prompt; returns the condensed text and chunk counts"""
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+        self.stats["documents"] += 1
+        chunks = chunk_text(text, self.max_tokens)
+        if len(chunks) <= 1:
+            return {"text": text.strip(), "chunks": len(chunks), "cached_chunks": 0}
+
+        self.stats["chunks"] += len(chunks)
+        partials, cached_chunks = await self._map(chunks, semaphore)
+
+        # Reduce: fold neighbouring partials together until they fit in one prompt
+        combined = "\n\n".join(partials)
+        rounds = 0
+        while count_tokens(combined) > self.max_tokens:
+            if rounds >= self.max_reduce_rounds:
+                self.stats["truncated"] += 1
+                combined = truncate_tokens(combined, self.max_tokens)
+                break
+            rounds += 1
+            self.stats["reduce_rounds"] += 1
+            groups = chunk_text(combined, self.max_tokens)
+            if len(groups) == len(partials):
+                # Nothing merged; pair partials up so every round shrinks the input
+                groups = ["\n\n".join(partials[i:i + 2]) for i in range(0, len(partials), 2)]
+            partials, _ = await self._map(groups, semaphore)
+            combined = "\n\n".join(partials)
+        return {"text": combined, "chunks": len(chunks), "cached_chunks": cached_chunks}
+
+    async def layer(self, name: str, condensed: str, semaphore: Optional[asyncio.Semaphore] = None) -> str:
+        """Write one summerise.yaml layer from condensed text"""
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+        return await self._generate(self._prompt(LAYERS[name], condensed), semaphore)
+
+    async def stream(self, text: str) -> AsyncIterator[Dict]:
+        """
+        Yield {"layer", "summary"} for short, then medium, then long. All three
+        start together (short first in the queue) and each is yielded as soon
+        as it and the layers before it are done; the short event also carries
+        the chunk counts.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        condensed = await self.condense(text, semaphore)
+        tasks = [asyncio.ensure_future(self.layer(name, condensed["text"], semaphore)) for name in LAYERS]
+        try:
+            for name, task in zip(LAYERS, tasks):
+                event = {"layer": name, "summary": await task}
+                if name == "short":
+                    event.update(chunks=condensed["chunks"], cached_chunks=condensed["cached_chunks"])
+                yield event
+        finally:
+            # A consumer that stops early (client gone) should not leave layers generating
+            for task in tasks:
+                task.cancel()
+
+    async def summarise(self, text: str) -> Dict:
+        """All three layers plus chunk counts"""
+        result = {}
+        async for event in self.stream(text):
+            result[event.pop("layer")] = event.pop("summary")
+            result.update(event)
+        return result
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "max_tokens": self.max_tokens,
+            "max_concurrency": self.max_concurrency,
+            "max_reduce_rounds": self.max_reduce_rounds,
+            "cache": self.cache.get_stats() if self.cache is not None else None
+        }
@@ -0,0 +1,74 @@
+"""
+Single Flight - Coalesce concurrent identical calls into one
+When many callers ask for the same key at once, only the first (the leader)
+does the work; everyone else waits for and shares its result or error.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+class _Call:
+    """One in-flight call shared by its waiters"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+class SingleFlight:
+    """Thread and asyncio single-flight groups keyed by string"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn once per key across concurrent threads and share its outcome"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.stats["leaders"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async do(): concurrent coroutines with the same key share one task"""
+        task = self._tasks.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["leaders"] += 1
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # Shielded so one waiter being cancelled does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> Dict:
+        calls = self.stats["leaders"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "coalesce_rate": round(self.stats["coalesced"] / calls, 4) if calls else 0.0,
+            "in_flight": len(self._calls) + len(self._tasks)
+        }
@@ -0,0 +1,166 @@
+"""
+Tauhou Metrics Store - Fixed-memory time series for health metrics
+Raw samples live in a ring buffer of NumPy columns (one per metric), and every
+sample is also folded into 1-minute and 1-hour rollups of their own fixed
+size. Status counters are kept as samples arrive, so summaries never rescan
+history and a long-running process never grows.
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+def _value(value) -> Optional[float]:
+    value = float(value)
+    return None if math.isnan(value) else round(value, 4)
+
+class RingBuffer:
+    """Last `capacity` samples: a timestamp column plus one float64 column per metric (NaN when missing)"""
+
+    def __init__(self, columns: List[str], capacity: int):
+        self.columns = list(columns)
+        self.capacity = max(capacity, 1)
+        self.timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self.data = {column: np.full(self.capacity, np.nan) for column in self.columns}
+        self.head = 0  # Next slot to write
+        self.size = 0
+
+    def append(self, timestamp: float, values: Dict[str, float]):
+        slot = self.head
+        self.timestamps[slot] = timestamp
+        for column in self.columns:
+            value = values.get(column)
+            self.data[column][slot] = np.nan if value is None else value
+        self.head = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _order(self, limit: Optional[int] = None) -> np.ndarray:
+        """Slots oldest to newest, optionally only the newest `limit`"""
+        count = self.size if limit is None else min(limit, self.size)
+        return np.arange(self.head - count, self.head) % self.capacity
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + sum(column.nbytes for column in self.data.values())
+
+    def records(self, limit: Optional[int] = None) -> List[Dict]:
+        slots = self._order(limit)
+        columns = {column: self.data[column][slots] for column in self.columns}
+        return [
+            {"timestamp": float(self.timestamps[slot]),
+             **{column: _value(columns[column][position]) for column in self.columns}}
+            for position, slot in enumerate(slots)
+        ]
+
+class Rollup:
+    """
+    Downsampled series: one bucket per `resolution` seconds holding count,
+    mean, min and max of every metric, for the last `capacity` buckets. Each
+    sample updates the current bucket in place.
+    """
+
+    def __init__(self, columns: List[str], resolution: float, capacity: int):
+        self.columns = list(columns)
+        self.resolution = resolution
+        self.capacity = max(capacity, 1)
+        self.starts = np.full(self.capacity, np.nan)
+        shape = (self.capacity, len(self.columns))
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.sums = np.zeros(shape)
+        self.mins = np.full(shape, np.inf)
+        self.maxs = np.full(shape, -np.inf)
+        self.current: Optional[int] = None  # Bucket number (start // resolution) being filled
+        self.head = -1
+        self.size = 0
+
+    def add(self, timestamp: float, values: Dict[str, float]):
+        bucket = int(timestamp // self.resolution)
+        if self.current is None or bucket > self.current:
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.current = bucket
+            self.starts[self.head] = bucket * self.resolution
+            self.counts[self.head] = 0
+            self.sums[self.head] = 0.0
+            self.mins[self.head] = np.inf
+            self.maxs[self.head] = -np.inf
+        # A sample older than the current bucket (clock step back) joins the current one
+        row = np.array([np.nan if values.get(column) is None else values[column] for column in self.columns])
+        present = ~np.isnan(row)
+        self.counts[self.head, present] += 1
+        self.sums[self.head, present] += row[present]
+        self.mins[self.head, present] = np.minimum(self.mins[self.head, present], row[present])
+        self.maxs[self.head, present] = np.maximum(self.maxs[self.head, present], row[present])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.starts, self.counts, self.sums, self.mins, self.maxs))
+
+    def records(self, limit: Optional[int] = None) -> List[Dict]:
+        count = self.size if limit is None else min(limit, self.size)
+        slots = np.arange(self.head - count + 1, self.head + 1) % self.capacity
+        records = []
+        for slot in slots:
+            record = {"timestamp": float(self.starts[slot])}
+            for position, column in enumerate(self.columns):
+                n = int(self.counts[slot, position])
+                record[column] = {
+                    "count": n,
+                    "mean": _value(self.sums[slot, position] / n) if n else None,
+                    "min": _value(self.mins[slot, position]) if n else None,
+                    "max": _value(self.maxs[slot, position]) if n else None
+                }
+            records.append(record)
+        return records
+
+class MetricsStore:
+    """
+    Raw ring buffer + rollups + O(1) status counters for one set of metric
+    columns. Memory is fixed at construction.
+    """
+
+    ROLLUPS = {"1m": 60.0, "1h": 3600.0}
+
+    def __init__(self, columns: List[str], capacity: int = 3600, rollup_capacity: Optional[Dict[str, int]] = None):
+        rollup_capacity = {"1m": 1440, "1h": 720, **(rollup_capacity or {})}  # A day of minutes, a month of hours
+        self.columns = list(columns)
+        self.raw = RingBuffer(self.columns, capacity)
+        self.rollups = {
+            name: Rollup(self.columns, resolution, rollup_capacity[name]) for name, resolution in self.ROLLUPS.items()
+        }
+        self.status_counts: Dict[str, int] = {}
+        self.total = 0
+        self.latest: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    def record(self, timestamp: float, values: Dict[str, float], status: Optional[str] = None,
+               latest: Optional[Dict] = None):
+        """Add one sample; `latest` is the full record kept for the summary (alerts and all)"""
+        with self._lock:
+            self.raw.append(timestamp, values)
+            for rollup in self.rollups.values():
+                rollup.add(timestamp, values)
+            if status is not None:
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            self.total += 1
+            self.latest = latest if latest is not None else {"timestamp": timestamp, **values}
+
+    def history(self, resolution: str = "raw", limit: Optional[int] = None) -> List[Dict]:
+        """Samples ("raw") or rollup buckets ("1m", "1h"), oldest first"""
+        with self._lock:
+            if resolution == "raw":
+                return self.raw.records(limit)
+            if resolution not in self.rollups:
+                raise ValueError(f"Unknown resolution '{resolution}'. Options: {['raw', *self.rollups]}")
+            return self.rollups[resolution].records(limit)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "samples": self.total,
+                "raw": {"stored": self.raw.size, "capacity": self.raw.capacity},
+                **{name: {"stored": rollup.size, "capacity": rollup.capacity} for name, rollup in self.rollups.items()},
+                "bytes": self.raw.nbytes + sum(rollup.nbytes for rollup in self.rollups.values())
+            }
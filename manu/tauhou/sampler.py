@@ -0,0 +1,152 @@
+"""
+Tauhou Sampler - System metrics gathered in the background
+A daemon thread samples CPU, memory, disk, network and process metrics every
+interval and publishes them as one snapshot. Readers take the latest snapshot
+instead of measuring on the request path, so a health check costs a dict
+lookup rather than psutil's one-second CPU measurement.
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import psutil
+
+class SystemSampler:
+    """
+    Background psutil sampler. CPU figures are measured over the time since
+    the previous sample (cpu_percent(interval=None)), network figures are
+    rates over the same window, and the top processes are ranked by CPU.
+    """
+
+    def __init__(self, interval: float = 5.0, disk_path: str = "/", top_processes: int = 5):
+        self.interval = max(interval, 0.1)
+        self.disk_path = disk_path
+        self.top_processes = top_processes
+        self.process = psutil.Process(os.getpid())
+        self.boot_time = psutil.boot_time()
+        self.samples = 0
+        self.errors = 0
+        self.last_duration = 0.0
+        self._snapshot: Optional[Dict] = None
+        self._previous_net = None
+        self._previous_at = None
+        self._process_cache: Dict[int, psutil.Process] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+
+        # Prime the CPU counters so the first real sample covers a real window
+        psutil.cpu_percent(interval=None)
+        self.process.cpu_percent(interval=None)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="tauhou-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self.interval):
+                return
+
+    def _top(self) -> List[Dict]:
+        """Busiest processes by CPU since the last sample (Process objects are kept so the deltas are real)"""
+        if not self.top_processes:
+            return []
+        current, ranked = {}, []
+        for pid in psutil.pids():
+            try:
+                proc = self._process_cache.get(pid) or psutil.Process(pid)
+                cpu = proc.cpu_percent(interval=None)
+                ranked.append((cpu, pid, proc.name(), proc.memory_info().rss))
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            current[pid] = proc
+        self._process_cache = current
+        ranked.sort(key=lambda entry: -entry[0])
+        return [
+            {"pid": pid, "name": name, "cpu_percent": cpu, "memory_mb": round(rss / 2 ** 20, 1)}
+            for cpu, pid, name, rss in ranked[:self.top_processes]
+        ]
+
+    def sample(self) -> Dict:
+        """Take one sample now and publish it as the latest snapshot"""
+        with self._sample_lock:
+            started = time.perf_counter()
+            now = time.time()
+            try:
+                memory = psutil.virtual_memory()
+                disk = psutil.disk_usage(self.disk_path)
+                net = psutil.net_io_counters()
+                elapsed = now - self._previous_at if self._previous_at else None
+                sent_rate = recv_rate = None
+                if elapsed and self._previous_net is not None:
+                    sent_rate = max(net.bytes_sent - self._previous_net.bytes_sent, 0) / elapsed
+                    recv_rate = max(net.bytes_recv - self._previous_net.bytes_recv, 0) / elapsed
+                self._previous_net, self._previous_at = net, now
+
+                with self.process.oneshot():
+                    process = {
+                        "pid": self.process.pid,
+                        "cpu_percent": self.process.cpu_percent(interval=None),
+                        "memory_mb": round(self.process.memory_info().rss / 2 ** 20, 1),
+                        "threads": self.process.num_threads()
+                    }
+                snapshot = {
+                    "cpu_usage": psutil.cpu_percent(interval=None),
+                    "memory_usage": memory.percent,
+                    "disk_usage": (disk.used / disk.total) * 100,
+                    "uptime_hours": (now - self.boot_time) / 3600,
+                    "net_sent_bytes_per_s": round(sent_rate, 1) if sent_rate is not None else None,
+                    "net_recv_bytes_per_s": round(recv_rate, 1) if recv_rate is not None else None,
+                    "process_cpu": process["cpu_percent"],
+                    "process_memory_mb": process["memory_mb"],
+                    "process": process,
+                    "top_processes": self._top(),
+                    "sampled_at": now,
+                    "timestamp": datetime.utcfromtimestamp(now).isoformat()
+                }
+            except Exception as e:
+                self.errors += 1
+                snapshot = {
+                    "error": f"Could not gather metrics: {str(e)}",
+                    "sampled_at": now,
+                    "timestamp": datetime.utcfromtimestamp(now).isoformat()
+                }
+            self.samples += 1
+            self.last_duration = time.perf_counter() - started
+            # Published by swapping the reference, so readers never see a half-built snapshot
+            self._snapshot = snapshot
+            return snapshot
+
+    def snapshot(self) -> Dict:
+        """The latest snapshot (sampled now if there is none yet) with its age in seconds"""
+        snapshot = self._snapshot or self.sample()
+        return {**snapshot, "sample_age_seconds": round(time.time() - snapshot["sampled_at"], 3)}
+
+    def get_stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "errors": self.errors,
+            "last_duration_ms": round(self.last_duration * 1000, 3)
+        }
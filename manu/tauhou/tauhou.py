@@ -5,11 +5,20 @@ The silvereye that monitors system health, performance metrics, and alerts on is
 
 import os
 import json
-import psutil
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
 
+from manu.route_metrics import route_metrics
+from manu.tauhou.metrics_store import MetricsStore
+from manu.tauhou.sampler import SystemSampler
+
+METRIC_COLUMNS = [
+    "cpu_usage", "memory_usage", "disk_usage", "uptime_hours",
+    "net_sent_bytes_per_s", "net_recv_bytes_per_s", "process_cpu", "process_memory_mb"
+]
+
 class Tauhou:
     """
     Tauhou - The Health Monitor
@@ -19,7 +28,22 @@ class Tauhou:
     def __init__(self):
         self.name = "Tauhou"
         self.role = "Health Monitor"
-        self.health_logs = []
+        # Fixed-size history: raw samples plus 1-minute and 1-hour rollups
+        self.health_metrics = MetricsStore(
+            METRIC_COLUMNS,
+            capacity=int(os.getenv("TAUHOU_HISTORY_SIZE") or 3600),
+            rollup_capacity={
+                "1m": int(os.getenv("TAUHOU_MINUTE_ROLLUPS") or 1440),
+                "1h": int(os.getenv("TAUHOU_HOUR_ROLLUPS") or 720)
+            }
+        )
+        # System metrics are sampled in the background; checks read the latest snapshot
+        self.sampler = SystemSampler(
+            interval=float(os.getenv("TAUHOU_SAMPLE_INTERVAL") or 5),
+            disk_path=os.getenv("TAUHOU_DISK_PATH") or "/",
+            top_processes=int(os.getenv("TAUHOU_TOP_PROCESSES") or 5)
+        )
+        self.sampler.start()
         self.performance_metrics = {}
         self.alert_thresholds = {
             "cpu_usage": 80,
@@ -46,7 +70,7 @@ class Tauhou:
             "overall_health": health_analysis["overall_health"]
         }
         
-        self.health_logs.append(health_log)
+        self.health_metrics.record(time.time(), metrics, health_analysis["status"], health_log)
         
         if health_analysis["status"] == "healthy":
             return f"🐦 Tauhou monitored health - all systems healthy at {timestamp}"
@@ -56,35 +80,8 @@ class Tauhou:
             return f"🐦 Tauhou detected critical issues: {health_analysis['alerts']} at {timestamp}"
     
     def _gather_system_metrics(self) -> dict:
-        """Tauhou gathers system metrics with keen precision"""
-        try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            
-            # Memory usage
-            memory = psutil.virtual_memory()
-            memory_percent = memory.percent
-            
-            # Disk usage
-            disk = psutil.disk_usage('/')
-            disk_percent = (disk.used / disk.total) * 100
-            
-            # System uptime
-            uptime = psutil.boot_time()
-            uptime_hours = (datetime.now().timestamp() - uptime) / 3600
-            
-            return {
-                "cpu_usage": cpu_percent,
-                "memory_usage": memory_percent,
-                "disk_usage": disk_percent,
-                "uptime_hours": uptime_hours,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        except Exception as e:
-            return {
-                "error": f"Could not gather metrics: {str(e)}",
-                "timestamp": datetime.utcnow().isoformat()
-            }
+        """Tauhou reads the latest background sample - no waiting on the CPU meter"""
+        return self.sampler.snapshot()
     
     def _analyze_health(self, metrics: dict) -> dict:
         """Tauhou analyzes health with keen observation"""
@@ -136,32 +133,48 @@ class Tauhou:
     
     def get_health_summary(self) -> dict:
         """Tauhou's health monitoring summary"""
-        if not self.health_logs:
+        store = self.health_metrics
+        if store.latest is None:
             return {
                 "kaitiaki": self.name,
                 "status": "no_data",
                 "message": "No health data available yet"
             }
         
-        # Get latest health status
-        latest_log = self.health_logs[-1]
-        
-        # Count health statuses
-        healthy_count = len([log for log in self.health_logs if log.get("health_status") == "healthy"])
-        warning_count = len([log for log in self.health_logs if log.get("health_status") == "warning"])
-        critical_count = len([log for log in self.health_logs if log.get("health_status") == "critical"])
+        # Latest check and running status counters; no history is rescanned
+        latest_log = store.latest
         
         return {
             "kaitiaki": self.name,
-            "total_health_checks": len(self.health_logs),
-            "healthy_checks": healthy_count,
-            "warning_checks": warning_count,
-            "critical_checks": critical_count,
+            "total_health_checks": store.total,
+            "healthy_checks": store.status_counts.get("healthy", 0),
+            "warning_checks": store.status_counts.get("warning", 0),
+            "critical_checks": store.status_counts.get("critical", 0),
             "latest_status": latest_log.get("health_status", "unknown"),
             "latest_metrics": latest_log.get("metrics", {}),
-            "alert_thresholds": self.alert_thresholds
+            "alert_thresholds": self.alert_thresholds,
+            "history": store.get_stats()
         }
     
+    def get_health_history(self, resolution: str = "raw", limit: Optional[int] = 60) -> List[Dict]:
+        """Tauhou's memory of past checks: raw samples or 1m / 1h rollups, oldest first"""
+        return self.health_metrics.history(resolution, limit)
+    
+    def get_route_metrics(self, top: Optional[int] = None) -> dict:
+        """Tauhou watches the paths through the forest: latency, traffic and errors per route"""
+        return route_metrics.get_stats(top)
+    
+    def get_prometheus_metrics(self) -> str:
+        """Route metrics plus the latest system sample, in Prometheus text format"""
+        lines = route_metrics.prometheus()
+        snapshot = self.sampler.snapshot()
+        for column in METRIC_COLUMNS:
+            value = snapshot.get(column)
+            if value is None:
+                continue
+            lines += [f"# TYPE ngahere_system_{column} gauge", f"ngahere_system_{column} {value}"]
+        return "\n".join(lines) + "\n"
+    
     def get_status(self) -> dict:
         """Tauhou's overall status"""
         return {
@@ -175,5 +188,7 @@ class Tauhou:
                 "system_observation",
                 "metric_analysis"
             ],
-            "health_summary": self.get_health_summary()
+            "health_summary": self.get_health_summary(),
+            "sampler": self.sampler.get_stats(),
+            "routes": self.get_route_metrics(top=10)
         }
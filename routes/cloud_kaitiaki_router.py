@@ -0,0 +1,51 @@
+import json
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Optional
+from manu.cloud_kaitiaki import CloudKaitiaki
+
+router = APIRouter()
+cloud_kaitiaki = CloudKaitiaki()
+
+class GenerateInput(BaseModel):
+    prompt: str
+    preferred_model: Optional[str] = None
+    use_cache: Optional[bool] = None  # True caches a sampled request too, False skips the cache
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.get("/")
+async def cloud_kaitiaki_status():
+    """Cloud Kaitiaki status - providers, models and connection pools"""
+    return cloud_kaitiaki.get_status()
+
+@router.post("/generate")
+async def generate(data: GenerateInput):
+    """Generate text with automatic provider fallback"""
+    result = await cloud_kaitiaki.agenerate_with_fallback(data.prompt, data.preferred_model, use_cache=data.use_cache)
+    return {
+        "kaitiaki": cloud_kaitiaki.name,
+        "result": result
+    }
+
+@router.post("/stream")
+async def stream(data: GenerateInput):
+    """Stream generated tokens as server-sent events (chunk, then done or error)"""
+    async def events():
+        model = None
+        try:
+            async for piece in cloud_kaitiaki.astream_with_fallback(data.prompt, data.preferred_model):
+                model = piece["model"]
+                yield _sse("chunk", piece)
+        except Exception as e:
+            yield _sse("error", {"model": model, "error": str(e)})
+            return
+        yield _sse("done", {"model": model})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Dict, Optional
+from manu.jobs import FINISHED, JobQueue
+
+router = APIRouter()
+jobs = JobQueue()
+
+class JobInput(BaseModel):
+    kind: str  # e.g. karearea.scan, ruru.summarise, kotare.embed
+    payload: Dict = {}  # Keyword arguments for the task
+    priority: int = 0  # Higher runs first
+    max_attempts: int = 3
+
+def _job(job_id: str) -> Dict:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
+def _summary(job: Dict) -> Dict:
+    """A job without its (possibly large) result"""
+    return {key: value for key, value in job.items() if key != "result"}
+
+@router.get("/")
+async def jobs_status():
+    """Queue depth by status, worker health and the job kinds on offer"""
+    return jobs.get_status()
+
+@router.get("/list")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """The most recent jobs, optionally only those with one status"""
+    return [_summary(job) for job in jobs.store.list(status, limit)]
+
+@router.post("/submit", status_code=202)
+async def submit_job(data: JobInput):
+    """Queue a job and return its id straight away; the work happens in a worker process"""
+    try:
+        job = jobs.submit(data.kind, data.payload, data.priority, data.max_attempts)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return _summary(job)
+
+@router.get("/{job_id}")
+async def job_status(job_id: str):
+    """Status, attempts and last error of a job"""
+    return _summary(_job(job_id))
+
+@router.get("/{job_id}/result")
+async def job_result(job_id: str):
+    """The result of a finished job; 409 while it is still queued or running"""
+    job = _job(job_id)
+    if job["status"] not in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is {job['status']}")
+    return {"id": job_id, "status": job["status"], "result": job["result"], "error": job["error"]}
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued job, or stop the worker running it"""
+    _job(job_id)
+    return {"id": job_id, "status": jobs.cancel(job_id)}
@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+import json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from manu.karearea.karearea import Karearea
 
@@ -6,23 +8,32 @@ router = APIRouter()
 karearea = Karearea()
 
 class ImageInput(BaseModel):
-    image_path: str
+    image_path: str  # An image, a PDF, or a directory of them
 
 @router.get("/")
 async def karearea_status():
     """Karearea status - the scanner is ready"""
-    return {
-        "kaitiaki": karearea.name,
-        "status": "ready",
-        "capabilities": ["ocr", "image_scanning", "text_extraction"]
-    }
+    return karearea.get_status()
 
 @router.post("/scan")
-async def scan_image(data: ImageInput):
-    """Karearea scans an image with sharp eyesight"""
-    result = karearea.scan(data.image_path)
+def scan_image(data: ImageInput):
+    """Karearea scans every page with sharp eyesight, across all cores"""
+    try:
+        result = karearea.scan(data.image_path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     return {
         "kaitiaki": karearea.name,
         "image_path": data.image_path,
         "result": result
-    }
\ No newline at end of file
+    }
+
+@router.post("/scan/stream")
+def scan_stream(data: ImageInput):
+    """Karearea streams one NDJSON line per page as soon as that page is read"""
+    try:
+        pages = karearea.scan_pages(data.image_path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    lines = (json.dumps(page, ensure_ascii=False) + "\n" for page in pages)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from typing import List, Optional
 from manu.kea.kea import Kea
 
 router = APIRouter()
@@ -11,6 +12,30 @@ class PromptInput(BaseModel):
 class CodeInput(BaseModel):
     code: str
 
+class SearchInput(BaseModel):
+    query: str
+    limit: int = 20
+    sources: Optional[List[str]] = None
+
+@router.get("/")
+async def kea_status():
+    """Kea status - the sources Kea can search"""
+    return {
+        "kaitiaki": kea.name,
+        "status": "ready",
+        "capabilities": ["federated_search", "prompt_optimisation", "stress_testing"],
+        "search": kea.search_engine.get_status()
+    }
+
+@router.post("/search")
+async def search(data: SearchInput):
+    """Kea searches LINZ, Māori Land Court and Papers Past at once"""
+    try:
+        result = await kea.search(data.query, data.limit, data.sources)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"kaitiaki": kea.name, **result}
+
 @router.post("/optimize")
 async def optimize_prompt(data: PromptInput):
     return {"kaitiaki": kea.name, "result": kea.optimize(data.prompt)}
@@ -1,28 +1,115 @@
-from fastapi import APIRouter
+import time
+import asyncio
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from manu.kotare.kotare import Kotare
+from typing import Dict, List, Optional
+from manu.kotare.kotare import DEFAULT_COLLECTION, Kotare
 
 router = APIRouter()
 kotare = Kotare()
 
 class TextInput(BaseModel):
-    text: str
+    text: Optional[str] = None
+    texts: Optional[List[str]] = None
+    include_vectors: bool = True
+
+class RememberInput(BaseModel):
+    texts: List[str]
+    ids: Optional[List[str]] = None
+    metadata: Optional[List[Dict]] = None
+    collection: str = DEFAULT_COLLECTION
+
+class SearchInput(BaseModel):
+    query: str
+    k: int = 5
+    filters: Optional[Dict] = None
+    collection: str = DEFAULT_COLLECTION
+
+class ForgetInput(BaseModel):
+    ids: List[str]
+    collection: str = DEFAULT_COLLECTION
+
+class CollectionInput(BaseModel):
+    name: str
+    quantization: Optional[str] = None  # none, int8 or pq
+    pq_subvectors: Optional[int] = None
 
 @router.get("/")
 async def kotare_status():
     """Kotare status - the embedder is ready"""
+    return kotare.get_status()
+
+@router.post("/embed")
+async def embed_text(data: TextInput):
+    """Kotare embeds one text or a list of texts into vectors, one backend call per batch"""
+    texts = data.texts if data.texts is not None else ([data.text] if data.text is not None else None)
+    if texts is None:
+        raise HTTPException(status_code=422, detail="Provide 'text' or 'texts'")
+    vectors = await asyncio.to_thread(kotare.embed, texts)
+    response = {
+        "kaitiaki": kotare.name,
+        "count": len(texts),
+        "dim": kotare.engine.dim
+    }
+    if data.text is not None and data.texts is None:
+        response["text"] = data.text
+    if data.include_vectors:
+        response["vectors"] = vectors.tolist()
+    return response
+
+@router.post("/remember")
+async def remember(data: RememberInput):
+    """Kotare embeds texts and stores them in the memory index (in a thread: an insert may retrain the index)"""
+    try:
+        ids = await asyncio.to_thread(kotare.remember, data.texts, data.ids, data.metadata, data.collection)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     return {
         "kaitiaki": kotare.name,
-        "status": "ready",
-        "capabilities": ["embedding", "vector_search", "memory_storage"]
+        "collection": data.collection,
+        "ids": ids,
+        "index_size": len(kotare.collection(data.collection))
     }
 
-@router.post("/embed")
-async def embed_text(data: TextInput):
-    """Kotare embeds text into vectors"""
-    result = kotare.embed(data.text)
+@router.post("/search")
+async def search(data: SearchInput):
+    """Kotare finds the k nearest memories, optionally filtered on metadata"""
+    started = time.perf_counter()
+    try:
+        results = await asyncio.to_thread(kotare.search, data.query, data.k, data.filters, data.collection)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {
+        "kaitiaki": kotare.name,
+        "collection": data.collection,
+        "query": data.query,
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+@router.post("/forget")
+async def forget(data: ForgetInput):
+    """Kotare drops memories from the index"""
+    try:
+        forgotten = await asyncio.to_thread(kotare.forget, data.ids, data.collection)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {
+        "kaitiaki": kotare.name,
+        "collection": data.collection,
+        "forgotten": forgotten,
+        "index_size": len(kotare.collection(data.collection))
+    }
+
+@router.post("/collections")
+async def create_collection(data: CollectionInput):
+    """Kotare opens a memory collection; quantization trades recall for memory (int8 4x, pq 16x)"""
+    try:
+        index = await asyncio.to_thread(kotare.collection, data.name, data.quantization, data.pq_subvectors)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     return {
         "kaitiaki": kotare.name,
-        "text": data.text,
-        "result": result
+        "collection": data.name,
+        "index": index.get_stats()
     }
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from routes.tauhou_router import tauhou
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-route and system metrics for Prometheus to scrape"""
+    return PlainTextResponse(tauhou.get_prometheus_metrics(), media_type="text/plain; version=0.0.4")
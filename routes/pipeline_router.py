@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from manu.kotare.kotare import DEFAULT_COLLECTION
+from manu.pipeline import IngestPipeline
+# Share the kaitiaki the other routers opened, so caches and index files are opened once
+from routes.karearea_router import karearea
+from routes.kotare_router import kotare
+from routes.ruru_router import ruru
+
+router = APIRouter()
+pipeline = IngestPipeline(karearea, ruru, kotare)
+
+class IngestInput(BaseModel):
+    path: str  # A PDF, an image, or a directory of them
+    collection: str = DEFAULT_COLLECTION
+    summarise: bool = True
+
+@router.get("/")
+async def pipeline_status():
+    """The running ingestion (per-stage throughput so far) and the last finished one"""
+    return pipeline.get_status()
+
+@router.post("/ingest")
+async def ingest(data: IngestInput):
+    """Karearea scans, Ruru summarises and Kotare embeds and indexes, page by page as each is ready"""
+    try:
+        report = await pipeline.ingest(data.path, data.collection, data.summarise)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return report
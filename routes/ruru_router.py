@@ -1,5 +1,8 @@
+import json
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import List, Literal, Optional
 from manu.ruru.ruru import Ruru
 
 router = APIRouter()
@@ -8,6 +11,53 @@ ruru = Ruru()
 class TextInput(BaseModel):
     text: str
 
+class StreamInput(BaseModel):
+    text: str
+    format: Literal["sse", "ndjson"] = "sse"
+
+class BatchInput(BaseModel):
+    texts: List[str]
+    max_concurrency: int = 8
+    preferred_model: Optional[str] = None
+
 @router.post("/summarise")
 async def summarise(data: TextInput):
-    return {"kaitiaki": ruru.name, "result": ruru.summarise(data.text)}
+    """Ruru summarises text of any length into short, medium and long layers"""
+    return {"kaitiaki": ruru.name, "result": await ruru.asummarise(data.text)}
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _ndjson(event: str, data: dict) -> str:
+    return json.dumps({"event": event, **data}, ensure_ascii=False) + "\n"
+
+@router.post("/summarise/stream")
+async def summarise_stream(data: StreamInput):
+    """Ruru streams the short layer first, then medium, then long (then done or error)"""
+    encode = _sse if data.format == "sse" else _ndjson
+
+    async def events():
+        try:
+            async for layer in ruru.summarise_stream(data.text):
+                yield encode(layer["layer"], layer)
+        except Exception as e:
+            yield encode("error", {"error": str(e)})
+            return
+        yield encode("done", {"kaitiaki": ruru.name})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if data.format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/summarise_batch")
+async def summarise_batch(data: BatchInput):
+    """Ruru summarises many texts in parallel; errors are reported per item"""
+    results = await ruru.summarise_batch(data.texts, data.max_concurrency, data.preferred_model)
+    return {
+        "kaitiaki": ruru.name,
+        "count": len(results),
+        "failed": sum(1 for item in results if item["error"]),
+        "results": results
+    }
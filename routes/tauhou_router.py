@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from typing import Optional
 from manu.tauhou.tauhou import Tauhou
 
 router = APIRouter()
@@ -18,6 +19,32 @@ async def get_health_summary():
     """Tauhou's health monitoring summary"""
     return tauhou.get_health_summary()
 
+@router.get("/system")
+async def get_system_snapshot():
+    """Tauhou's latest background sample: CPU, memory, disk, network and processes"""
+    return tauhou.sampler.snapshot()
+
+@router.get("/routes")
+async def get_route_metrics(top: Optional[int] = None):
+    """Per-route latency (p50/p95/p99), request counts, in-flight requests and error rates"""
+    return {
+        "kaitiaki": tauhou.name,
+        "routes": tauhou.get_route_metrics(top)
+    }
+
+@router.get("/history")
+async def get_health_history(resolution: str = "raw", limit: Optional[int] = 60):
+    """Tauhou's health history: raw samples, or 1m / 1h rollups with mean, min and max"""
+    try:
+        history = tauhou.get_health_history(resolution, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {
+        "kaitiaki": tauhou.name,
+        "resolution": resolution,
+        "history": history
+    }
+
 @router.post("/monitor")
 async def monitor_health():
     """Tauhou monitors system health"""